@@ -161,6 +161,10 @@ def main():
         # Run AutoRun script
         autorun_script()
 
+        # Validate all script files in the background
+        if configuration.Configuration.ValidateScripts():
+            engine.led_command_handler.LEDCommandHandler.led_engine.validate_scripts()
+
         terminate_service = False
         while not terminate_service:
             # We do a lot of sleeping to avoid using too much CPU :-)
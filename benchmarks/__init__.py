@@ -0,0 +1,12 @@
+#
+# AtHomeLED - Benchmarks
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+# benchmarks
@@ -0,0 +1,106 @@
+#
+# AtHomeLED - Script compiler benchmark
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Measures script compiler throughput on machine generated scripts
+# of increasing size. Run from the AtHomeLED directory:
+#
+#   python -m benchmarks.compiler_benchmark [lines...]
+#
+# For each script size the benchmark reports the compile time, the
+# throughput in lines per second and the peak memory allocated during
+# the compile. If the compiler scales linearly, lines per second
+# stays about the same for all script sizes.
+#
+
+import os
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+from engine.script_vm import ScriptVM
+from engine.script_compiler import ScriptCompiler
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def generate_script(path, lines):
+    """
+    Generate a long show like the ones produced by our show generators.
+    :param path: Script file to be written
+    :param lines: Approximate number of lines
+    :return: None
+    """
+    rnd = random.Random(lines)
+    with open(path, "w") as sf:
+        sf.write("# Generated script with {0} lines\n".format(lines))
+        sf.write("color warm 255 147 41\n")
+        sf.write("define step-wait 40.0\n")
+        sf.write("eval fade-steps 100\n")
+        sf.write("do-for-n 2\n")
+        for i in range(lines - 6):
+            r = rnd.randint(0, 255)
+            g = rnd.randint(0, 255)
+            b = rnd.randint(0, 255)
+            if i % 2:
+                sf.write("    solidcolor {0} {1} {2} step-wait # step {3}\n".format(r, g, b, i))
+            else:
+                sf.write("    colorfade warm {0} {1} {2} step-wait fade-steps\n".format(r, g, b))
+        sf.write("do-for-n-end\n")
+
+
+def run_benchmark(path, lines):
+    """
+    Compile a generated script. The script is compiled twice. The first
+    compile is timed. The second compile measures memory (tracing memory
+    allocations slows the compiler down considerably).
+    :param path: Script file
+    :param lines: Number of lines in the script
+    :return: Tuple (seconds, lines-per-second, peak-memory-bytes)
+    """
+    start = time.perf_counter()
+    compile_script(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    compile_script(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, lines / elapsed, peak
+
+
+def compile_script(path):
+    """
+    Compile a script file
+    :param path: Script file
+    :return: The compiled VM
+    """
+    vm = ScriptVM(path)
+    compiler = ScriptCompiler(vm)
+    if not compiler.compile(path):
+        raise RuntimeError("\n".join(compiler.last_error))
+    return vm
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_SIZES
+    print("{0:>10} {1:>10} {2:>14} {3:>12}".format("lines", "seconds", "lines/second", "peak KB"))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for lines in sizes:
+            path = os.path.join(temp_dir, "generated_{0}.led".format(lines))
+            generate_script(path, lines)
+            elapsed, lps, peak = run_benchmark(path, lines)
+            print("{0:>10} {1:>10.3f} {2:>14.0f} {3:>12.0f}".format(lines, elapsed, lps, peak / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#
+# AtHomeLED - Frame rate benchmark
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Measures the frames per second each algorithm can produce for strips
+# of different lengths. Run from the AtHomeLED directory:
+#
+#   python -m benchmarks.frame_benchmark [pixels...]
+#
+# The algorithms run with a wait time of zero on the dummy driver, so
+# the result is the rendering cost of the engine alone (frame buffer
+# plus the hand off to the driver). A real strip is also limited by
+# its data rate. Each frame buffer implementation is measured (NumPy
+# only if it is installed).
+#
+
+import sys
+import time
+import threading
+from driver.dummy_driver import DummyDriver
+from engine.script_vm import ScriptVM
+from engine.script_cpu_led import ScriptCPULED
+from engine.frame_buffer import create_frame_buffer
+
+DEFAULT_SIZES = [50, 200, 1000]
+
+# Algorithm statements as produced by the compiler (wait time is zero)
+STATEMENTS = [
+    ["rainbow", 0, 1],
+    ["rainbowcycle", 0, 1],
+    ["theaterchase", 255, 0, 0, 0, 40],
+    ["theaterchase2", 255, 0, 0, 0, 255, 0, 0, 40],
+    ["twocolor", 255, 0, 0, 0, 255, 0, 0, 200],
+    ["sinewave", 0, 200, 127, 128],
+    ["colorfade", 255, 0, 0, 0, 0, 255, 0, 200, "linear", False],
+    ["color77", ScriptVM("<benchmark>").evals["color77-default"], 0, 200],
+]
+
+
+class CountingDriver(DummyDriver):
+    """
+    Dummy driver that counts the frames it is shown
+    """
+    def __init__(self):
+        DummyDriver.__init__(self)
+        self.frames = 0
+
+    def show(self):
+        self.frames += 1
+        return True
+
+
+def run_benchmark(stmt, pixels, kind):
+    """
+    Run one algorithm statement
+    :param stmt: Compiled statement (list of tokens)
+    :param pixels: Number of pixels
+    :param kind: Frame buffer implementation (numpy or compact)
+    :return: Frames per second
+    """
+    leddev = CountingDriver()
+    leddev.open(pixels)
+    cpu = ScriptCPULED(leddev, ScriptVM("<benchmark>"), threading.Event(),
+                       frame_buffer=create_frame_buffer(leddev, kind=kind))
+    start = time.perf_counter()
+    cpu._valid_stmts[stmt[0]](list(stmt))
+    elapsed = time.perf_counter() - start
+    return leddev.frames / elapsed
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_SIZES
+    kinds = ["compact"]
+    try:
+        import numpy
+        kinds.append("numpy")
+    except ImportError:
+        print("NumPy is not installed, only the compact frame buffer is measured")
+
+    for kind in kinds:
+        print()
+        print("{0:<20}".format(kind + " fps") + "".join(["{0:>12}".format(s) for s in sizes]))
+        for stmt in STATEMENTS:
+            line = "{0:<20}".format(stmt[0])
+            for pixels in sizes:
+                line += "{0:>12.0f}".format(run_benchmark(stmt, pixels, kind))
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
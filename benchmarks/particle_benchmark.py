@@ -0,0 +1,71 @@
+#
+# AtHomeLED - Particle system benchmark
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Measures the frames per second of the particle system with 1,000 live
+# particles on strips of different lengths. Run from the AtHomeLED directory:
+#
+#   python -m benchmarks.particle_benchmark [pixels...]
+#
+# Each frame moves, ages and draws every particle and hands the frame to
+# the dummy driver. The particle system requires NumPy.
+#
+
+import sys
+import time
+from driver.dummy_driver import DummyDriver
+from engine.frame_buffer import create_frame_buffer
+from engine.particles import ParticleSystem
+import numpy
+
+DEFAULT_SIZES = [200, 1000]
+PARTICLES = 1000
+FRAMES = 500
+
+
+def run_benchmark(pixels, kind):
+    """
+    Run the particle system for FRAMES frames
+    :param pixels: Number of pixels
+    :param kind: Frame buffer implementation (numpy or compact)
+    :return: Frames per second
+    """
+    leddev = DummyDriver()
+    leddev.open(pixels)
+    frame = create_frame_buffer(leddev, kind=kind)
+    rng = numpy.random.default_rng(1)
+    particles = ParticleSystem(pixels, capacity=PARTICLES, trail=0.5, drag=0.99)
+
+    start = time.perf_counter()
+    for f in range(FRAMES):
+        # Replace the particles that died, so all of them are live every frame
+        dead = PARTICLES - particles.count
+        particles.emit(dead, rng.uniform(0, pixels - 1, dead), rng.uniform(-1.0, 1.0, dead),
+                       rng.uniform(0, 255, (dead, 3)), rng.uniform(20, 60, dead))
+        particles.update()
+        particles.splat(frame)
+        frame.show()
+    elapsed = time.perf_counter() - start
+    return FRAMES / elapsed
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_SIZES
+    print("{0:<20}".format("{0} particles fps".format(PARTICLES)) + "".join(["{0:>12}".format(s) for s in sizes]))
+    for kind in ("compact", "numpy"):
+        line = "{0:<20}".format(kind)
+        for pixels in sizes:
+            line += "{0:>12.0f}".format(run_benchmark(pixels, kind))
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
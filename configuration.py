@@ -113,6 +113,21 @@ class Configuration():
             pass
         return default_value
 
+    ######################################################################
+    @classmethod
+    def get_optional_var(cls, var_name, default_value=None):
+        # An optional variable that is not in the configuration file quietly
+        # takes its default value. So does every variable when there is no
+        # configuration (for example, the benchmarks).
+        if cls.ActiveConfig is None:
+            return default_value
+        try:
+            return cls.ActiveConfig.get(var_name, default_value)
+        except Exception as ex:
+            logger.error("Unable to read configuration variable {0}".format(var_name))
+            logger.error(str(ex))
+        return default_value
+
     ######################################################################
     @classmethod
     def Port(cls):
@@ -193,6 +208,151 @@ class Configuration():
     def AutoRun(cls):
         return cls.get_config_var("AutoRun", default_value="")
 
+    ######################################################################
+    @classmethod
+    def ScriptCacheSize(cls):
+        return int(cls.get_optional_var("ScriptCacheSize", default_value=16))
+
+    ######################################################################
+    @classmethod
+    def FrameBuffer(cls):
+        return str(cls.get_optional_var("FrameBuffer", default_value="auto")).lower()
+
+    ######################################################################
+    @classmethod
+    def FrameCacheSize(cls):
+        return int(cls.get_optional_var("FrameCacheSize", default_value=1024))
+
+    ######################################################################
+    @classmethod
+    def Dithering(cls):
+        # true, false or a comma separated list of the drivers that dither
+        value = str(cls.get_optional_var("Dithering", default_value="false")).lower()
+        if value in ("true", "false"):
+            return value == "true"
+        return str(cls.Driver()).lower() in [d.strip() for d in value.split(",")]
+
+    ######################################################################
+    @classmethod
+    def PowerBudget(cls):
+        return int(cls.get_optional_var("PowerBudget", default_value=0))
+
+    ######################################################################
+    @classmethod
+    def PowerChannelCurrent(cls):
+        return float(cls.get_optional_var("PowerChannelCurrent", default_value=20.0))
+
+    ######################################################################
+    @classmethod
+    def PowerIdleCurrent(cls):
+        return float(cls.get_optional_var("PowerIdleCurrent", default_value=1.0))
+
+    ######################################################################
+    @classmethod
+    def Gamma(cls):
+        return float(cls.get_optional_var("Gamma", default_value=1.0))
+
+    ######################################################################
+    @classmethod
+    def WhiteBalance(cls):
+        # A list [r, g, b] or a string "r, g, b" of values 0-255
+        wb = cls.get_optional_var("WhiteBalance", default_value=[255, 255, 255])
+        if isinstance(wb, str):
+            wb = wb.split(",")
+        try:
+            wb = [min(max(int(v), 0), 255) for v in wb]
+            if len(wb) == 3:
+                return wb
+        except ValueError:
+            pass
+        logger.error("WhiteBalance must be 3 values 0-255")
+        return [255, 255, 255]
+
+    ######################################################################
+    @classmethod
+    def OutputColorOrder(cls):
+        order = str(cls.get_optional_var("OutputColorOrder", default_value="rgb")).lower()
+        if sorted(order) != ["b", "g", "r"]:
+            logger.error("OutputColorOrder must be an order of r, g and b")
+            return "rgb"
+        return order
+
+    ######################################################################
+    @classmethod
+    def Reverse(cls):
+        return str(cls.get_optional_var("Reverse", default_value="false")).lower() == "true"
+
+    ######################################################################
+    @classmethod
+    def InterpolationRate(cls):
+        return int(cls.get_optional_var("InterpolationRate", default_value=0))
+
+    ######################################################################
+    @classmethod
+    def InterpolationOptOut(cls):
+        # A list or a comma separated string of statement and generator names
+        names = cls.get_optional_var("InterpolationOptOut",
+                                     default_value="theaterchase, theaterchase2, theaterchaserainbow, "
+                                                   "runwaychase, scrollpixels, twocolor, color77")
+        if isinstance(names, str):
+            names = names.split(",")
+        return set(str(name).strip().lower() for name in names)
+
+    ######################################################################
+    @classmethod
+    def LayoutWidth(cls):
+        return int(cls.get_optional_var("LayoutWidth", default_value=0))
+
+    ######################################################################
+    @classmethod
+    def LayoutHeight(cls):
+        return int(cls.get_optional_var("LayoutHeight", default_value=0))
+
+    ######################################################################
+    @classmethod
+    def LayoutSerpentine(cls):
+        return str(cls.get_optional_var("LayoutSerpentine", default_value="false")).lower() == "true"
+
+    ######################################################################
+    @classmethod
+    def LayoutOrigin(cls):
+        return str(cls.get_optional_var("LayoutOrigin", default_value="top-left")).lower()
+
+    ######################################################################
+    @classmethod
+    def LayoutRotation(cls):
+        return int(cls.get_optional_var("LayoutRotation", default_value=0))
+
+    ######################################################################
+    @classmethod
+    def LayoutMap(cls):
+        return cls.get_optional_var("LayoutMap", default_value="")
+
+    ######################################################################
+    @classmethod
+    def AudioPipeRate(cls):
+        return int(cls.get_optional_var("AudioPipeRate", default_value=44100))
+
+    ######################################################################
+    @classmethod
+    def AudioPipeChannels(cls):
+        return int(cls.get_optional_var("AudioPipeChannels", default_value=1))
+
+    ######################################################################
+    @classmethod
+    def ValidateScripts(cls):
+        return str(cls.get_optional_var("ValidateScripts", default_value="true")).lower() == "true"
+
+    ######################################################################
+    @classmethod
+    def WatchScripts(cls):
+        return str(cls.get_optional_var("WatchScripts", default_value="false")).lower() == "true"
+
+    ######################################################################
+    @classmethod
+    def WatchInterval(cls):
+        return float(cls.get_optional_var("WatchInterval", default_value=1.0))
+
     ######################################################################
     @classmethod
     def Timeout(cls):
@@ -131,6 +131,17 @@ class AdafruitCircuitPythonWS28xxDriver(DriverBase):
             self._driver[index] = color_value & 0xFFFFFF
         return True
 
+    def setPixels(self, colors):
+        """
+        Set all pixels from a frame of color values
+        :param colors: List of color values in the form 0xRRGGBB, one per pixel.
+        :return:
+        """
+        # The pixel list supports slice assignment
+        # And, the color can only occupy the lo order 24 bits
+        self._driver[0:len(colors)] = [color_value & 0xFFFFFF for color_value in colors]
+        return True
+
     def clear(self):
         """
         Set all pixels to off.
@@ -45,6 +45,11 @@ class DotStar(DriverBase):
         self._strip = Adafruit_DotStar(num_pixels, order=order.encode('utf-8'))
         # print self._strip
         self._numpixels = num_pixels
+        # Strip-ready frame set by setPixels(): 4 bytes per pixel, 0xFF and then
+        # the colors in the strip's order. None when the pixels were set one by one.
+        self._raw = None
+        order = order.lower()
+        self._raw_offsets = [1 + order.index(c) for c in "rgb"] if sorted(order) == ["b", "g", "r"] else [3, 2, 1]
         return self._begin()
 
     def _begin(self):
@@ -53,6 +58,9 @@ class DotStar(DriverBase):
         return True
 
     def show(self):
+        if self._raw is not None:
+            # The raw frame is written as is (no brightness scaling)
+            return self._strip.show(self._raw) == 0
         return self._strip.show() == 0
 
     def numPixels(self):
@@ -63,10 +71,26 @@ class DotStar(DriverBase):
         return True
 
     def setPixelColor(self, index, color_value):
+        self._raw = None
         self._strip.setPixelColor(index, color_value)
         return True
 
+    def setPixels(self, colors):
+        """
+        Set all pixels from a frame of color values. The frame is built as a
+        strip-ready raw frame that show() hands to the strip in one call.
+        :param colors: List of color values in the form 0xRRGGBB, one per pixel.
+        :return:
+        """
+        count = min(len(colors), self._numpixels)
+        raw = bytearray(b"\xff\x00\x00\x00" * self._numpixels)
+        for c, channel in enumerate(DriverBase.rgb_bytes(colors[:count])):
+            raw[self._raw_offsets[c]:4 * count:4] = channel
+        self._raw = raw
+        return True
+
     def clear(self):
+        self._raw = None
         for i in range(self._numpixels):
             self._strip.setPixelColor(i, 0)
         self._strip.show()
@@ -13,6 +13,10 @@
 # LED driver base class - all things common to a driver
 #
 
+import sys
+import array
+
+
 class DriverBase:
     """
     A device driver must implement each of the methods in this class.
@@ -83,6 +87,31 @@ class DriverBase:
     def setPixelColor(self, index, color_value):
         return True
 
+    def setPixels(self, colors):
+        """
+        Set all pixels from a frame of color values. A driver whose
+        device supports it should override this with a bulk transfer.
+        :param colors: List of color values (as created by color()),
+        one per pixel starting with pixel 0.
+        :return:
+        """
+        for index, color_value in enumerate(colors):
+            self.setPixelColor(index, color_value)
+        return True
+
+    @staticmethod
+    def rgb_bytes(colors):
+        """
+        Split a frame of 0xRRGGBB color values into its channels in bulk
+        (for drivers that send raw frames)
+        :param colors: List of color values in the form 0xRRGGBB
+        :return: Tuple of bytes (r, g, b), one byte per pixel in each
+        """
+        packed = array.array("I", colors).tobytes()
+        if sys.byteorder == "little":
+            return packed[2::4], packed[1::4], packed[0::4]
+        return packed[1::4], packed[2::4], packed[3::4]
+
     def clear(self):
         return True
 
@@ -59,6 +59,9 @@ class DummyDriver(DriverBase):
     def setPixelColor(self, index, color_value):
         return True
 
+    def setPixels(self, colors):
+        return True
+
     def clear(self):
         return True
 
@@ -44,11 +44,10 @@ class LEDEmulator(DriverBase):
         self._brightness = 31
 
         # Create the APA102-like LED data frame
-        # The frame is a list so the elements can be assigned
-        self._frame = [0, 0, 0, 0]
-        for i in range(num_pixels):
-            self._frame.extend([0xE0 + self._brightness, 0, 0, 0])
-        self._frame.extend([0xFF, 0xFF, 0xFF, 0xFF])
+        # The frame is a bytearray so the elements can be assigned
+        self._frame = bytearray(4)
+        self._frame.extend(bytes((0xE0 + self._brightness, 0, 0, 0)) * num_pixels)
+        self._frame.extend(b"\xff\xff\xff\xff")
 
         return self._begin()
 
@@ -73,7 +72,7 @@ class LEDEmulator(DriverBase):
         self._frame[px + 3] = b
 
     def show(self):
-        # Convert the frame as a list to a string of bytes
+        # Convert the frame to a string of bytes
         frame_bytes = bytes(self._frame)
         LEDEmulator.frame_send(self._sock, frame_bytes)
 
@@ -102,6 +101,19 @@ class LEDEmulator(DriverBase):
             return True
         raise ValueError("Index is out of range")
 
+    def setPixels(self, colors):
+        """
+        Set all pixels from a frame of color values
+        :param colors: List of color values in the form 0xRRGGBB, one per pixel.
+        :return:
+        """
+        count = min(len(colors), self._numpixels)
+        end = 4 + 4 * count
+        self._frame[4:end:4] = bytes((0xE0 + self._brightness,)) * count
+        for c, channel in enumerate(DriverBase.rgb_bytes(colors[:count])):
+            self._frame[5 + c:end:4] = channel
+        return True
+
     def clear(self):
         for i in range(self._numpixels):
             self._set_pixel(i, 0, 0, 0)
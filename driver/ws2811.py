@@ -90,6 +90,16 @@ class WS2811(DriverBase):
             self._strip.setPixelColor(index, color_value)
         return True
 
+    def setPixels(self, colors):
+        """
+        Set all pixels from a frame of color values
+        :param colors: List of color values in the form 0xRRGGBB, one per pixel.
+        :return:
+        """
+        # The strip's pixel data supports slice assignment
+        self._strip.getPixels()[0:len(colors)] = colors
+        return True
+
     def clear(self):
         for i in range(self._numpixels):
             self._strip.setPixelColor(i, 0)
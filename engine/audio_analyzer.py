@@ -0,0 +1,184 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Audio analyzer for the audio reactive algorithm
+#
+# The analyzer runs in its own thread. It reads PCM audio from a WAV file
+# or a named pipe, runs a windowed FFT for every frame's worth of samples
+# and publishes the level of each frequency band. The render thread only
+# picks up the latest levels, so the audio work never delays a frame.
+# This module requires NumPy.
+#
+
+import os
+import stat
+import time
+import wave
+import threading
+import logging
+import numpy
+import configuration
+
+logger = logging.getLogger("led")
+
+# Number of samples in the FFT window
+WINDOW_SIZE = 1024
+# Frequency range covered by the bands
+LOW_FREQUENCY = 40.0
+HIGH_FREQUENCY = 16000.0
+# The level of a band is relative to its recent peak, which decays by this
+# factor every frame
+PEAK_DECAY = 0.995
+
+
+class AudioAnalyzer(threading.Thread):
+    """
+    Reads audio and computes the level (0.0-1.0) of each frequency band.
+    A WAV file must be 16 bit PCM and is read at its real time rate. A
+    named pipe carries raw 16 bit little endian PCM (see AudioPipeRate and
+    AudioPipeChannels in the configuration) and is read as fast as it is
+    written.
+    """
+    def __init__(self, source, bands, frame_time):
+        """
+        Constructor
+        :param source: Path to a WAV file or a named pipe
+        :param bands: Number of frequency bands
+        :param frame_time: Time between frames in seconds. One frame of
+        audio is analyzed at a time.
+        """
+        threading.Thread.__init__(self, daemon=True)
+        self._source = source
+        self._bands = bands
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._levels = [0.0] * bands
+        self._wav = None
+        self._pipe = None
+
+        if stat.S_ISFIFO(os.stat(source).st_mode):
+            # The pipe is opened by the thread (open waits for a writer)
+            self._rate = configuration.Configuration.AudioPipeRate()
+            self._channels = configuration.Configuration.AudioPipeChannels()
+        else:
+            self._wav = wave.open(source, "rb")
+            if self._wav.getsampwidth() != 2:
+                self._wav.close()
+                raise ValueError("WAV file must be 16 bit PCM")
+            self._rate = self._wav.getframerate()
+            self._channels = self._wav.getnchannels()
+
+        # Samples analyzed per frame
+        self._hop = max(int(self._rate * frame_time), 1)
+        self._window = numpy.hanning(WINDOW_SIZE)
+        self._samples = numpy.zeros(WINDOW_SIZE)
+        self._band_starts, self._band_ends = self._band_bins()
+        self._peaks = numpy.full(bands, 1e-3)
+
+    @property
+    def levels(self):
+        """
+        Returns the latest band levels (list of floats 0.0-1.0)
+        """
+        with self._lock:
+            return self._levels
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _band_bins(self):
+        """
+        Split the FFT bins into bands that are evenly spaced on a log scale
+        :return: Tuple of arrays (first bin of each band, end bin of each band)
+        """
+        bin_hz = self._rate / float(WINDOW_SIZE)
+        high = min(HIGH_FREQUENCY, self._rate / 2.0)
+        edges = numpy.geomspace(LOW_FREQUENCY, high, self._bands + 1) / bin_hz
+        last_bin = WINDOW_SIZE // 2
+        starts = numpy.minimum(numpy.floor(edges[:-1]).astype(numpy.intp), last_bin)
+        # Every band has at least one bin
+        ends = numpy.maximum(numpy.floor(edges[1:]).astype(numpy.intp), starts + 1)
+        return starts, numpy.minimum(ends, last_bin + 1)
+
+    def _read(self):
+        """
+        Read one frame of audio
+        :return: Mono samples as floats or None at the end of the audio
+        """
+        if self._wav is not None:
+            data = self._wav.readframes(self._hop)
+        else:
+            data = self._pipe.read(self._hop * self._channels * 2)
+        # Drop a partial sample at the end of a pipe
+        data = data[:len(data) - len(data) % (2 * self._channels)]
+        if not data:
+            return None
+        samples = numpy.frombuffer(data, dtype="<i2").astype(numpy.float64)
+        if self._channels > 1:
+            samples = samples.reshape(-1, self._channels).mean(axis=1)
+        return samples
+
+    def _analyze(self, samples):
+        """
+        Add samples to the window and compute the band levels
+        :param samples: New mono samples
+        :return: None
+        """
+        n = min(len(samples), WINDOW_SIZE)
+        self._samples = numpy.roll(self._samples, -n)
+        self._samples[-n:] = samples[-n:]
+
+        magnitudes = numpy.abs(numpy.fft.rfft(self._samples * self._window))
+        # Average the bins of each band from a running sum of the bins
+        totals = numpy.concatenate(([0.0], numpy.cumsum(magnitudes)))
+        energy = (totals[self._band_ends] - totals[self._band_starts]) / (self._band_ends - self._band_starts)
+
+        self._peaks = numpy.maximum(self._peaks * PEAK_DECAY, energy)
+        levels = numpy.clip(energy / self._peaks, 0.0, 1.0).tolist()
+        with self._lock:
+            self._levels = levels
+
+    def run(self):
+        logger.debug("Audio analyzer started for %s", self._source)
+        try:
+            if self._wav is None:
+                self._pipe = open(self._source, "rb")
+            next_time = time.perf_counter()
+            while not self._stop_event.is_set():
+                samples = self._read()
+                if samples is None:
+                    break
+                self._analyze(samples)
+                if self._wav is not None:
+                    # A file is read at the rate it would be played
+                    next_time += len(samples) / float(self._rate)
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+        except Exception as ex:
+            logger.error("Audio analyzer error: %s", str(ex))
+        finally:
+            if self._wav is not None:
+                self._wav.close()
+            if self._pipe is not None:
+                self._pipe.close()
+            with self._lock:
+                self._levels = [0.0] * self._bands
+            self._stop_event.set()
+            logger.debug("Audio analyzer ended for %s", self._source)
+
+    @property
+    def ended(self):
+        """
+        Returns True when the audio has ended (or the analyzer was stopped)
+        """
+        return self._stop_event.is_set()
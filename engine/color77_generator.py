@@ -22,38 +22,39 @@ from .pixel_generator import PixelGenerator
 class Color77PixelGenerator(PixelGenerator):
     """
     Color77 (note the originality of the name -:))
-    A set of 7 colors is marched across the string.
-    One at a time, every 7 pixels
+    A set of n colors (originally 7) is marched across the string.
+    One at a time, every n pixels
     iiiiiii...iiiiiii
     aiiiiii...aiiiiii
     aaiiiii...aaiiiii
     ...
     aaaaaaa...aaaaaaa
     baaaaaa...baaaaaa
+
+    Each step changes every n-th pixel to the same color, so render()
+    draws a frame with a single strided fill no matter how long the
+    string is.
     """
     def __init__(self, num_pixels=50, color_list=None):
         """
         Constructor
         :param num_pixels:  Number of pixels in string.
-        :param color_list: List of 7 colors (3-tuple color (r,g,b))
+        :param color_list: List of one or more colors (3-tuple color (r,g,b))
         """
         super(Color77PixelGenerator, self).__init__(num_pixels=num_pixels)
-        # Defaults
-        self.num_colors = 7
         if color_list:
-            if len(color_list) != 7:
-                raise ValueError("Color list must contain 7 items")
-            self.color_list = color_list
+            self.color_list = [tuple(c) for c in color_list]
         else:
-            self.color_list = [(0, 0, 0)] * self.num_colors
-            # TODO Provide a way to set the colors from a script
-            self.color_list[0] = (255, 0, 0)
-            self.color_list[1] = (0, 255, 0)
-            self.color_list[2] = (0, 0, 255)
-            self.color_list[3] = (255, 255, 0)
-            self.color_list[4] = (255, 255, 255)
-            self.color_list[5] = (0, 255, 255)
-            self.color_list[6] = (255, 0, 255)
+            self.color_list = [
+                (255, 0, 0),
+                (0, 255, 0),
+                (0, 0, 255),
+                (255, 255, 0),
+                (255, 255, 255),
+                (0, 255, 255),
+                (255, 0, 255),
+            ]
+        self.num_colors = len(self.color_list)
         self.pixels = [self.color_list[0]] * self.num_pixels
         self.color_index = 0
         self.pixel_index = 0
@@ -61,20 +62,35 @@ class Color77PixelGenerator(PixelGenerator):
     def start(self):
         self.color_index = 0
         self.pixel_index = 0
+        self.pixels = [self.color_list[0]] * self.num_pixels
 
-    def step(self):
-        for x in range(0, self.num_pixels, self.num_colors):
-            if x + self.pixel_index >= self.num_pixels:
-                break;
-            self.pixels[x + self.pixel_index] = self.color_list[self.color_index]
+    def _advance(self):
+        """
+        Move to the next step
+        :return: The color and first pixel that the step changes
+        """
+        change = self.color_list[self.color_index], self.pixel_index
         self.pixel_index = (self.pixel_index + 1) % self.num_colors
         if self.pixel_index == 0:
             self.color_index = (self.color_index + 1) % self.num_colors
+        return change
+
+    def step(self):
+        color, first = self._advance()
+        self.pixels[first::self.num_colors] = [color] * len(range(first, self.num_pixels, self.num_colors))
 
     def pixel(self, n):
         return self.pixels[n]
         # For TK
         # return "#%02x%02x%02x" % self.pixels[n]
 
+    def render(self, frame_buffer, t):
+        # Only the changed pixels are drawn (the pixels list is not used)
+        if t == 0:
+            frame_buffer.fill(self.color_list[0])
+        else:
+            color, first = self._advance()
+            frame_buffer.fill_range(color, start=first, step=self.num_colors)
+
     def stop(self):
         pass
@@ -22,6 +22,11 @@
 #
 
 import math
+from functools import lru_cache
+
+# Number of generated color lists kept by sine_color_list()
+COLOR_LIST_CACHE_SIZE = 32
+
 
 class ColorCycler:
     """
@@ -216,6 +221,31 @@ class ColorCycler:
         blue = color & 0xff
         return red, green, blue
 
+@lru_cache(maxsize=COLOR_LIST_CACHE_SIZE)
+def sine_color_list(center=128, width=127, colors=32, frequencies=None, phases=(0.0, 2.0, 4.0)):
+    """
+    Creates a color list using the same algorithm as ColorCycler, but
+    one whole color component at a time. The lists are memoized (the
+    least recently used list is dropped when the cache is full), so a
+    script that runs the same sine wave over and over generates it once.
+    :param center: 0-128 Essentially the bias value (0 <= center <= 128)
+    :param width: 1-127. center + width should be in the range 0-255.
+    :param colors: The number of colors to be generated
+    :param frequencies: Tuple of (red, green, blue) frequencies. The default
+    produces one sine wave over the list.
+    :param phases: Tuple of (red, green, blue) phase angles in radians
+    :return: Tuple of colors (r, g, b). Treat it as read only, it is shared.
+    """
+    if frequencies is None:
+        frequencies = ((math.pi * 2.0) / colors,) * 3
+
+    components = []
+    for freq, phase in zip(frequencies, phases):
+        components.append([int((math.sin((freq * cycle) + phase) * width) + center) % 256
+                           for cycle in range(colors)])
+    return tuple(zip(*components))
+
+
 """
 Test code
 """
@@ -0,0 +1,92 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Color fade ramps
+#
+# Script colors are sRGB values. Mixing two sRGB values directly gives
+# fades that are muddy in the middle and jump at low levels. A fade ramp
+# is mixed in linear light (the amount of light) and converted back to
+# sRGB. It is computed once for the whole fade.
+#
+
+from functools import lru_cache
+from driver.driver_base import DriverBase
+
+# Number of fade ramps kept by build_fade()
+FADE_CACHE_SIZE = 32
+
+
+def _srgb_to_linear(value):
+    """
+    Convert an sRGB component to linear light
+    :param value: 0-255
+    :return: 0.0-1.0
+    """
+    c = value / 255.0
+    if c <= 0.04045:
+        return c / 12.92
+    return ((c + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    """
+    Convert a linear light component to sRGB
+    :param value: 0.0-1.0
+    :return: 0-255
+    """
+    if value <= 0.0031308:
+        c = value * 12.92
+    else:
+        c = 1.055 * (value ** (1.0 / 2.4)) - 0.055
+    return min(max(int(round(c * 255.0)), 0), 255)
+
+
+# sRGB to linear light for every component value
+_LINEAR = [_srgb_to_linear(v) for v in range(256)]
+
+# Easing curves. Each maps fade progress 0.0-1.0 to 0.0-1.0.
+EASINGS = {
+    "linear": lambda t: t,
+    "ease-in": lambda t: t * t,
+    "ease-out": lambda t: 1.0 - (1.0 - t) * (1.0 - t),
+    "ease-in-out": lambda t: t * t * (3.0 - 2.0 * t),
+}
+
+
+@lru_cache(maxsize=FADE_CACHE_SIZE)
+def build_fade(from_color, to_color, steps, easing="linear", gamma=False):
+    """
+    Build the ramp of colors for a fade. The first color is from_color
+    and the last color is to_color. The ramps are memoized, so a fade
+    that is repeated (e.g. in a do-forever loop) is computed once.
+    :param from_color: Tuple (r, g, b)
+    :param to_color: Tuple (r, g, b)
+    :param steps: Number of colors in the ramp
+    :param easing: Name of an easing curve (see EASINGS)
+    :param gamma: True to gamma correct the ramp for the LEDs (see DriverBase)
+    :return: Tuple of steps colors (r, g, b). Treat it as read only, it is shared.
+    """
+    if steps <= 1:
+        progress = [1.0]
+    else:
+        ease = EASINGS[easing]
+        progress = [ease(i / (steps - 1)) for i in range(steps)]
+
+    components = []
+    for c in range(3):
+        start = _LINEAR[from_color[c]]
+        delta = _LINEAR[to_color[c]] - start
+        ramp = [_linear_to_srgb(start + delta * t) for t in progress]
+        if gamma:
+            ramp = [DriverBase._gamma8[v] for v in ramp]
+        components.append(ramp)
+    return tuple(zip(*components))
@@ -0,0 +1,158 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Compact frame buffer (no third party packages)
+#
+
+import sys
+import operator
+from itertools import chain
+from .frame_buffer import FrameBuffer
+
+
+class CompactFrameBuffer(FrameBuffer):
+    """
+    Frame buffer backed by a bytearray holding 3 bytes (r, g, b) per pixel.
+    Every operation is done with bytes/bytearray slice assignment or
+    joins, so the per pixel work is done in C rather than by Python
+    method calls. This is the frame buffer for systems without NumPy
+    (e.g. a Pi Zero).
+
+    Color tables are lists of 3 byte bytes objects. Index lists are
+    itemgetters that pick a frame's worth of table entries.
+    """
+    def __init__(self, leddev, layout=None):
+        FrameBuffer.__init__(self, leddev, layout=layout)
+        self.pixels = bytearray(3 * self.num_pixels)
+        # Output frame with one 32 bit color value per pixel
+        self._packed = bytearray(4 * self.num_pixels)
+        # Byte position of r, g and b within a packed color value
+        self._positions = CompactFrameBuffer._byte_positions(self._shifts)
+
+    @staticmethod
+    def _byte_positions(shifts):
+        """
+        Returns the byte position of r, g and b within a packed color value
+        :param shifts: Bit positions of r, g and b
+        """
+        if sys.byteorder == "little":
+            return [shift // 8 for shift in shifts]
+        return [3 - shift // 8 for shift in shifts]
+
+    @staticmethod
+    def table(colors):
+        return [bytes(c) for c in colors]
+
+    @staticmethod
+    def indexes(index_list):
+        if len(index_list) == 1:
+            index = index_list[0]
+            return lambda table: (table[index],)
+        if not index_list:
+            return lambda table: ()
+        return operator.itemgetter(*index_list)
+
+    def _range(self, start, stop, step):
+        """
+        Normalize a pixel slice to a range of pixel indexes
+        """
+        return range(self.num_pixels)[start:stop:step]
+
+    def clear(self):
+        self.pixels[:] = bytes(len(self.pixels))
+
+    def fill(self, rgb):
+        self.pixels[:] = bytes(rgb) * self.num_pixels
+
+    def fill_range(self, rgb, start=0, stop=None, step=1):
+        pixels = self._range(start, stop, step)
+        if not pixels:
+            return
+        # One strided slice assignment per channel
+        first = 3 * pixels[0]
+        last = 3 * pixels[-1]
+        for c in range(3):
+            self.pixels[first + c:last + c + 1:3 * pixels.step] = bytes((rgb[c],)) * len(pixels)
+
+    def fill_pattern(self, table):
+        pattern = b"".join(table)
+        repeats = -(-len(self.pixels) // len(pattern))
+        self.pixels[:] = (pattern * repeats)[:len(self.pixels)]
+
+    def get_pixel(self, index):
+        return tuple(self.pixels[3 * index:3 * index + 3])
+
+    def set_pixel(self, index, rgb):
+        self.pixels[3 * index:3 * index + 3] = bytes(rgb)
+
+    def set_pixels(self, colors):
+        self.pixels[:] = bytes(chain.from_iterable(colors))
+
+    def write(self, data, start=0):
+        # Data past the end of the frame is dropped (the frame never grows)
+        count = min(len(data), len(self.pixels) - 3 * start)
+        if count > 0:
+            self.pixels[3 * start:3 * start + count] = data[:count]
+
+    def gather(self, table, indexes, offset=0):
+        # Rotating the (short) table is cheaper than offsetting every index
+        offset %= len(table)
+        if offset:
+            table = table[offset:] + table[:offset]
+        self.pixels[:] = b"".join(indexes(table))
+
+    def rotate(self, n):
+        k = 3 * (n % self.num_pixels) if self.num_pixels else 0
+        if k:
+            self.pixels[:] = self.pixels[-k:] + self.pixels[:-k]
+
+    def keep_every(self, start, step):
+        kept = [self.pixels[3 * start + c::3 * step] for c in range(3)]
+        self.clear()
+        for c in range(3):
+            self.pixels[3 * start + c::3 * step] = kept[c]
+
+    def snapshot(self):
+        frame = bytes(self.pixels)
+        return frame, len(frame)
+
+    def restore(self, snapshot):
+        self.pixels[:] = snapshot
+
+    def blend(self, snapshot1, snapshot2, fraction):
+        # Each pixel channel gets a 16 bit lane of one big integer. With 8.8
+        # fixed point weights a lane holds at most 255 * 256, so all of the
+        # pixels are mixed by two integer multiplies without carries between
+        # lanes. The high byte of each lane is the mixed value.
+        w = int(fraction * 256 + 0.5)
+        lanes = bytearray(2 * len(self.pixels))
+        lanes[0::2] = snapshot1
+        mix1 = int.from_bytes(lanes, "little")
+        lanes[0::2] = snapshot2
+        mix2 = int.from_bytes(lanes, "little")
+        mixed = (mix1 * (256 - w) + mix2 * w).to_bytes(len(lanes), "little")
+        self.pixels[:] = mixed[1::2]
+
+    def rgb(self):
+        # Only used by the 16 bit output stage, which requires NumPy
+        import numpy
+        return numpy.frombuffer(bytes(self.pixels), dtype=numpy.uint8).reshape(-1, 3)
+
+    def colors(self, tables=None, shifts=None):
+        positions = self._positions if shifts is None else CompactFrameBuffer._byte_positions(shifts)
+        # Scatter each channel (through its lookup table) into its byte of the packed color values
+        for c in range(3):
+            if tables is None:
+                self._packed[positions[c]::4] = self.pixels[c::3]
+            else:
+                self._packed[positions[c]::4] = self.pixels[c::3].translate(tables[c])
+        return memoryview(self._packed).cast("I").tolist()
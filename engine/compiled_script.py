@@ -0,0 +1,128 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Persistent compiled script files
+#
+# A compiled script is saved in the __ledcache__ directory next to its
+# script file (much like Python's __pycache__). The file holds the
+# compiled statements, colors, defines and evals along with a format
+# version stamp and a fingerprint of every source file. A compiled
+# script file is only used when it is fresh: same format and server
+# version, same parameters and unchanged source files.
+#
+
+import os
+import hashlib
+import pickle
+import logging
+import version
+from . import script_vm
+from .script_cache import ScriptCache
+
+logger = logging.getLogger("led")
+
+# Change this when the layout of a compiled script file changes
+FORMAT_VERSION = 3
+
+CACHE_DIRECTORY = "__ledcache__"
+FILE_EXTENSION = ".ledc"
+
+
+def compiled_path(script_file, parameters=None):
+    """
+    Returns the path of the compiled script file for a script file and parameter set
+    :param script_file: Path to the script file
+    :param parameters: Dict of script parameters (name: value)
+    :return: Full path to the compiled script file
+    """
+    script_dir, script_name = os.path.split(os.path.abspath(script_file))
+    if parameters:
+        # Each parameter set gets its own file
+        params = repr(tuple(sorted(parameters.items()))).encode("utf-8")
+        script_name = "{0}.{1}".format(script_name, hashlib.sha1(params).hexdigest()[:12])
+    return os.path.join(script_dir, CACHE_DIRECTORY, script_name + FILE_EXTENSION)
+
+
+def save(vm, fingerprints):
+    """
+    Save a compiled script VM
+    :param vm: The compiled VM
+    :param fingerprints: Fingerprints of all of the VM source files (see ScriptCache)
+    :return: True if the compiled script file was written
+    """
+    path = compiled_path(vm.script_file, vm.parameters)
+    compiled = {
+        "format": FORMAT_VERSION,
+        "version": version.GetVersion(),
+        "parameters": tuple(sorted(vm.parameters.items())),
+        "sources": fingerprints,
+        "stmts": vm.stmts,
+        # Only the script defined colors (the web colors are shared)
+        "colors": dict(vm.colors.maps[0]),
+        "defines": vm.defines,
+        # eval() adds the builtins module to the globals dict
+        "evals": {k: v for k, v in vm.evals.items() if k != "__builtins__"},
+    }
+    # Write a temp file and rename it so a partially written file is never used
+    temp_path = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "wb") as cf:
+            pickle.dump(compiled, cf, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except Exception as ex:
+        logger.debug("Unable to save compiled script %s: %s", path, str(ex))
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    logger.debug("Saved compiled script %s", path)
+    return True
+
+
+def load(script_file, parameters=None):
+    """
+    Load a compiled script VM if its compiled script file is fresh
+    :param script_file: Path to the script file
+    :param parameters: Dict of script parameters (name: value)
+    :return: A tuple (vm, fingerprints) or None if there is no
+    compiled script file or it is stale.
+    """
+    path = compiled_path(script_file, parameters)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "rb") as cf:
+            compiled = pickle.load(cf)
+    except Exception as ex:
+        logger.debug("Unable to load compiled script %s: %s", path, str(ex))
+        return None
+
+    if compiled.get("format") != FORMAT_VERSION or compiled.get("version") != version.GetVersion():
+        logger.debug("Compiled script %s is from a different version", path)
+        return None
+    parameters = parameters if parameters else {}
+    if compiled["parameters"] != tuple(sorted(parameters.items())):
+        return None
+    if not ScriptCache.is_fresh(compiled["sources"]):
+        logger.debug("Compiled script %s is stale", path)
+        return None
+
+    vm = script_vm.ScriptVM(script_file, parameters=parameters)
+    vm.source_files = [fp[0] for fp in compiled["sources"]]
+    vm.stmts = compiled["stmts"]
+    vm.colors.update(compiled["colors"])
+    vm.defines.update(compiled["defines"])
+    vm.evals.update(compiled["evals"])
+    return vm, compiled["sources"]
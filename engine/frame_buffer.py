@@ -0,0 +1,309 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Frame buffer
+#
+# The algorithms draw a whole frame of RGB pixels into a frame buffer
+# using bulk operations (fill, strided fill, repeated pattern, table
+# lookup). When the frame is shown, it is converted to the driver's
+# color format and handed to the driver in one call.
+#
+# When a 2D layout is configured, the frame is a grid of pixels in row
+# order and the layout's index map is applied as the frame is shown.
+#
+
+import operator
+import logging
+import configuration
+from .layout import create_layout
+from .output_pipeline import create_output_pipeline
+
+logger = logging.getLogger("led")
+
+
+class FrameBuffer:
+    """
+    Template base class for a frame buffer. A frame buffer holds
+    num_pixels RGB pixels. A color is a 3-tuple/list (r, g, b) where
+    each value is 0-255.
+
+    Every operation is implemented here one pixel at a time with
+    get_pixel() and set_pixel(). An implementation must provide those
+    two and replaces the others with bulk operations. This template
+    holds no pixels, much like the dummy driver of DriverBase.
+
+    A color table (see table()) is a list of colors prepared for the
+    frame buffer implementation. An index list (see indexes()) is a
+    list of table indexes, one per pixel, prepared the same way.
+    """
+    def __init__(self, leddev, layout=None):
+        """
+        Constructor
+        :param leddev: The LED device driver that frames are shown on
+        :param layout: A 2D Layout or None for a strip
+        """
+        self._leddev = leddev
+        if layout is None:
+            # A strip is a grid with one row
+            self.num_pixels = leddev.numPixels()
+            self.width = self.num_pixels
+            self.height = 1
+            self._output = None
+        else:
+            self.num_pixels = layout.size
+            self.width = layout.width
+            self.height = layout.height
+            # Picks the pixel for each LED from the frame plus one black pixel
+            output = layout.output_indexes(leddev.numPixels())
+            if len(output) == 1:
+                self._output = lambda frame: [frame[output[0]]]
+            else:
+                self._output = operator.itemgetter(*output)
+        # Bit positions of r, g and b in the driver's color format
+        self._shifts = FrameBuffer.channel_shifts(leddev)
+        # Output pipeline (see engine/output_pipeline.py) or None
+        self.pipeline = None
+
+    @staticmethod
+    def channel_shifts(leddev):
+        """
+        Determine where the driver puts r, g and b in a color value
+        :param leddev: LED device driver
+        :return: Tuple of bit shifts (r, g, b)
+        """
+        return tuple(leddev.color(*c).bit_length() - 1 for c in ((1, 0, 0), (0, 1, 0), (0, 0, 1)))
+
+    @staticmethod
+    def table(colors):
+        """
+        Prepare a color table
+        :param colors: List of colors (r, g, b)
+        :return: The color table
+        """
+        return [tuple(c) for c in colors]
+
+    @staticmethod
+    def indexes(index_list):
+        """
+        Prepare a list of table indexes
+        :param index_list: List of ints, one per pixel
+        :return: The index list
+        """
+        return list(index_list)
+
+    def get_pixel(self, index):
+        """
+        Get one pixel
+        :param index: Pixel index
+        :return: Color (r, g, b)
+        """
+        return 0, 0, 0
+
+    def set_pixel(self, index, rgb):
+        """
+        Set one pixel
+        :param index: Pixel index
+        :param rgb: Color (r, g, b)
+        """
+        pass
+
+    def clear(self):
+        """
+        Set all pixels to black
+        """
+        self.fill((0, 0, 0))
+
+    def fill(self, rgb):
+        """
+        Set all pixels to a color
+        :param rgb: Color (r, g, b)
+        """
+        self.fill_range(rgb)
+
+    def fill_range(self, rgb, start=0, stop=None, step=1):
+        """
+        Set a range of pixels to a color. The range works like a slice.
+        :param rgb: Color (r, g, b)
+        :param start: First pixel
+        :param stop: End pixel (not included). None is the end of the frame.
+        :param step: Every step-th pixel is set
+        """
+        for index in range(self.num_pixels)[start:stop:step]:
+            self.set_pixel(index, rgb)
+
+    def fill_pattern(self, table):
+        """
+        Fill the frame by repeating a pattern of colors
+        :param table: Color table created by table()
+        """
+        for index in range(self.num_pixels):
+            self.set_pixel(index, table[index % len(table)])
+
+    def set_pixels(self, colors):
+        """
+        Set all pixels
+        :param colors: List of num_pixels colors (r, g, b)
+        """
+        for index, rgb in enumerate(colors):
+            self.set_pixel(index, rgb)
+
+    def write(self, data, start=0):
+        """
+        Copy raw pixel data into the frame
+        :param data: Bytes like object with 3 bytes (r, g, b) per pixel
+        :param start: First pixel written
+        """
+        # Data past the end of the frame is dropped
+        count = min(len(data) // 3, self.num_pixels - start)
+        for i in range(count):
+            self.set_pixel(start + i, tuple(data[3 * i:3 * i + 3]))
+
+    def gather(self, table, indexes, offset=0):
+        """
+        Set each pixel from a color table:
+        pixel[i] = table[(indexes[i] + offset) % len(table)]
+        :param table: Color table created by table()
+        :param indexes: Index list created by indexes()
+        :param offset: Added to every index (e.g. the animation step)
+        """
+        for index, table_index in enumerate(indexes):
+            self.set_pixel(index, table[(table_index + offset) % len(table)])
+
+    def rotate(self, n):
+        """
+        Rotate the frame. Pixel i moves to pixel (i + n) % num_pixels.
+        :param n: Number of pixels to rotate by. Negative rotates toward pixel 0.
+        """
+        k = n % self.num_pixels if self.num_pixels else 0
+        if k:
+            frame = self.snapshot()[0]
+            self.set_pixels(frame[-k:] + frame[:-k])
+
+    def keep_every(self, start, step):
+        """
+        Set all pixels to black except every step-th pixel beginning with start
+        :param start: First pixel that is kept
+        :param step: Distance between kept pixels
+        """
+        kept = [(index, self.get_pixel(index)) for index in range(start, self.num_pixels, step)]
+        self.clear()
+        for index, rgb in kept:
+            self.set_pixel(index, rgb)
+
+    def snapshot(self):
+        """
+        Returns an immutable copy of the frame (see restore())
+        :return: Tuple (snapshot, size in bytes)
+        """
+        frame = tuple(tuple(self.get_pixel(index)) for index in range(self.num_pixels))
+        return frame, 3 * len(frame)
+
+    def restore(self, snapshot):
+        """
+        Copy a snapshot back into the frame
+        :param snapshot: A snapshot created by snapshot()
+        """
+        self.set_pixels(snapshot)
+
+    def blend(self, snapshot1, snapshot2, fraction):
+        """
+        Set the frame to a linear mix of two snapshots
+        :param snapshot1: A snapshot created by snapshot()
+        :param snapshot2: A snapshot created by snapshot()
+        :param fraction: 0.0 (all snapshot1) to 1.0 (all snapshot2)
+        """
+        # 8.8 fixed point weights
+        w = int(fraction * 256 + 0.5)
+        for index, (rgb1, rgb2) in enumerate(zip(snapshot1, snapshot2)):
+            self.set_pixel(index, tuple((c1 * (256 - w) + c2 * w) >> 8 for c1, c2 in zip(rgb1, rgb2)))
+
+    def colors(self, tables=None, shifts=None):
+        """
+        Returns the frame in the driver's color format
+        :param tables: None or a lookup table (256 bytes) per channel the
+        values are mapped through
+        :param shifts: None or the bit positions of r, g and b to use instead
+        of the driver's
+        :return: List of num_pixels color values
+        """
+        r_shift, g_shift, b_shift = shifts if shifts is not None else self._shifts
+        colors = []
+        for index in range(self.num_pixels):
+            r, g, b = self.get_pixel(index)
+            if tables is not None:
+                r, g, b = tables[0][r], tables[1][g], tables[2][b]
+            colors.append((r << r_shift) | (g << g_shift) | (b << b_shift))
+        return colors
+
+    def rgb(self):
+        """
+        Returns the frame as a NumPy array for the 16 bit output stage
+        :return: (num_pixels, 3) uint8 array
+        """
+        # Only used by the 16 bit output stage, which requires NumPy
+        import numpy
+        return numpy.array(self.snapshot()[0], dtype=numpy.uint8).reshape(-1, 3)
+
+    def set_brightness(self, brightness):
+        """
+        Hand the brightness to the output pipeline (if there is one)
+        :param brightness: 0-255
+        :return: True if the pipeline applies brightness (the driver should not)
+        """
+        if self.pipeline is None:
+            return False
+        return self.pipeline.set_brightness(brightness)
+
+    def show(self):
+        """
+        Send the frame to the driver and show it
+        :return: The driver show() result
+        """
+        if self.pipeline is not None:
+            colors = self.pipeline.process(self)
+        else:
+            colors = self.colors()
+        if self._output is not None:
+            colors.append(0)
+            colors = list(self._output(colors))
+        if self.pipeline is not None and self.pipeline.reverse:
+            colors.reverse()
+        self._leddev.setPixels(colors)
+        return self._leddev.show()
+
+
+def create_frame_buffer(leddev, kind=None):
+    """
+    Create a frame buffer for a driver. The frame buffer implementations
+    are imported on first use, so NumPy is only imported when it is used.
+    :param leddev: The LED device driver that frames are shown on
+    :param kind: auto, numpy or compact. The default is the FrameBuffer
+    configuration value. auto uses NumPy if it is installed.
+    The configured 2D layout (if any) and output pipeline are applied.
+    :return: A frame buffer instance
+    """
+    if kind is None:
+        kind = configuration.Configuration.FrameBuffer()
+    layout = create_layout(leddev.numPixels())
+    frame = None
+    if kind in ("auto", "numpy"):
+        try:
+            from .numpy_frame_buffer import NumpyFrameBuffer
+            frame = NumpyFrameBuffer(leddev, layout=layout)
+        except ImportError:
+            if kind == "numpy":
+                logger.error("NumPy is not installed, using the compact frame buffer")
+    if frame is None:
+        from .compact_frame_buffer import CompactFrameBuffer
+        frame = CompactFrameBuffer(leddev, layout=layout)
+    frame.pipeline = create_output_pipeline(leddev, frame.num_pixels, frame._shifts)
+    return frame
@@ -0,0 +1,113 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Rendered frame cache
+#
+# Algorithms like rainbow are periodic (256 steps). Inside a do-forever
+# loop they draw the same frames over and over. The frame cache keeps the
+# rendered frames so that a repeated frame is a buffer copy instead of
+# a redraw.
+#
+
+import threading
+import logging
+from collections import OrderedDict
+import configuration
+
+logger = logging.getLogger("led")
+
+
+class FrameCache:
+    """
+    A memory bounded LRU cache of rendered frames. A frame is a frame
+    buffer snapshot (see FrameBuffer.snapshot()). The key is usually
+    (algorithm, pixel count, step, frame buffer type).
+    """
+    def __init__(self, max_bytes):
+        """
+        Constructor
+        :param max_bytes: Maximum total size of the cached frames. Zero disables the cache.
+        """
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        # key: (snapshot, size) in LRU order (most recent last)
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Look up a rendered frame
+        :param key: Frame key
+        :return: The frame snapshot or None
+        """
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, snapshot, size):
+        """
+        Add a rendered frame
+        :param key: Frame key
+        :param snapshot: Frame buffer snapshot
+        :param size: Size of the snapshot in bytes
+        :return: None
+        """
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._frames:
+                self._bytes -= self._frames[key][1]
+            self._frames[key] = (snapshot, size)
+            self._frames.move_to_end(key)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                evicted = self._frames.popitem(last=False)
+                self._bytes -= evicted[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def statistics(self):
+        """
+        Returns the cache statistics
+        :return: Dict of hits, misses, frames (cached) and bytes (cached)
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "frames": len(self._frames), "bytes": self._bytes}
+
+    def __len__(self):
+        return len(self._frames)
+
+
+# Singleton instance shared by all script runs
+_frame_cache = None
+
+
+def get_frame_cache():
+    """
+    Returns the frame cache. It is created on first use because the
+    configuration is not loaded when the engine is imported.
+    """
+    global _frame_cache
+    if _frame_cache is None:
+        _frame_cache = FrameCache(configuration.Configuration.FrameCacheSize() * 1024)
+    return _frame_cache
@@ -0,0 +1,136 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Pixel generator registry
+#
+# Pixel generators are referenced by name in scripts (see the generator
+# statement). A generator is registered as "module:class" and is not
+# imported until a script uses it. Other packages can add generators
+# through the athomeled.generators entry point group, for example in
+# setup.py:
+#
+#   entry_points={"athomeled.generators": ["sparkle = mypackage.sparkle:SparkleGenerator"]}
+#
+
+import importlib
+import threading
+import logging
+
+logger = logging.getLogger("led")
+
+ENTRY_POINT_GROUP = "athomeled.generators"
+
+# Generators that come with AtHomeLED (name: "module:class")
+_builtin_generators = {
+    "color77": "engine.color77_generator:Color77PixelGenerator",
+    # Particle effects (require NumPy)
+    "fireworks": "engine.particles:FireworksGenerator",
+    "comet": "engine.particles:CometGenerator",
+    "twinkle": "engine.particles:TwinkleGenerator",
+    "rain": "engine.particles:RainGenerator",
+}
+
+# name: "module:class", class or entry point
+_registry = None
+# name: generator class (imported)
+_loaded = {}
+_lock = threading.Lock()
+
+
+def _entry_points():
+    """
+    Returns the installed generator plugin entry points. Listing the
+    entry points reads package metadata only, the plugins are not imported.
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    try:
+        eps = entry_points()
+        if hasattr(eps, "select"):
+            return list(eps.select(group=ENTRY_POINT_GROUP))
+        return list(eps.get(ENTRY_POINT_GROUP, []))
+    except Exception as ex:
+        logger.error("Unable to list generator plugins: %s", str(ex))
+        return []
+
+
+def _get_registry():
+    """
+    Returns the registry, building it on first use
+    """
+    global _registry
+    if _registry is None:
+        registry = dict(_builtin_generators)
+        for ep in _entry_points():
+            # Script statements are matched in lower case
+            name = ep.name.lower()
+            if name in registry:
+                logger.error("Generator plugin %s conflicts with an existing generator", ep.name)
+                continue
+            registry[name] = ep
+        _registry = registry
+    return _registry
+
+
+def register_generator(name, generator):
+    """
+    Register a pixel generator
+    :param name: The name scripts use for the generator
+    :param generator: A PixelGenerator subclass or "module:class"
+    :return: None
+    """
+    with _lock:
+        _get_registry()[name.lower()] = generator
+        _loaded.pop(name.lower(), None)
+
+
+def generator_names():
+    """
+    Returns the names of all registered generators (none are imported)
+    """
+    with _lock:
+        return sorted(_get_registry().keys())
+
+
+def is_generator(name):
+    """
+    Returns True if a generator is registered under a name (it is not imported)
+    """
+    with _lock:
+        return name.lower() in _get_registry()
+
+
+def get_generator(name):
+    """
+    Returns a generator class, importing it on first use
+    :param name: Registered generator name
+    :return: PixelGenerator subclass
+    """
+    name = name.lower()
+    with _lock:
+        cls = _loaded.get(name)
+        if cls is not None:
+            return cls
+        generator = _get_registry()[name]
+        if isinstance(generator, str):
+            module_name, _, class_name = generator.partition(":")
+            cls = getattr(importlib.import_module(module_name), class_name)
+        elif isinstance(generator, type):
+            cls = generator
+        else:
+            # An entry point
+            cls = generator.load()
+        _loaded[name] = cls
+        logger.debug("Loaded generator %s", name)
+        return cls
@@ -0,0 +1,120 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Memory mapped image files
+#
+# Images are binary PPM files (P6 with a maximum value of 255) or raw
+# RGB files (.rgb, 3 bytes per pixel in row order with no header). The
+# file is memory mapped, so an image is never read into Python objects.
+# The pixels are already in the frame buffer's (r, g, b) row order, so
+# a frame is a slice of the mapped file.
+#
+
+import os
+import mmap
+
+RAW_EXTENSION = ".rgb"
+
+
+def read_ppm_header(f):
+    """
+    Parse the header of a binary PPM file
+    :param f: File opened in binary mode and positioned at the start
+    :return: Tuple (width, height, offset of the pixel data)
+    """
+    # The header is 4 whitespace separated fields that can have comments
+    fields = []
+    while len(fields) < 4:
+        line = f.readline()
+        if not line:
+            raise ValueError("Truncated PPM header")
+        fields.extend(line.partition(b"#")[0].split())
+    if fields[0] != b"P6" or len(fields) != 4:
+        raise ValueError("Not a binary PPM (P6) file")
+    width, height, max_value = (int(v) for v in fields[1:])
+    if max_value != 255:
+        raise ValueError("PPM maximum value must be 255")
+    return width, height, f.tell()
+
+
+class ImageFile:
+    """
+    A memory mapped RGB image
+    """
+    def __init__(self, path, width=None, height=None):
+        """
+        Open and map an image file
+        :param path: Path to a PPM or raw RGB file
+        :param width: Width of a raw RGB file. If None, the height is used to
+        determine the width.
+        :param height: Height of a raw RGB file
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        try:
+            if path.lower().endswith(RAW_EXTENSION):
+                size = os.fstat(self._file.fileno()).st_size
+                offset = 0
+                if width:
+                    height = size // (3 * width)
+                elif height:
+                    width = size // (3 * height)
+                else:
+                    raise ValueError("The size of a raw RGB image is unknown")
+            else:
+                width, height, offset = read_ppm_header(self._file)
+            if width <= 0 or height <= 0:
+                raise ValueError("Image is empty")
+            self.width = width
+            self.height = height
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._map) < offset + 3 * width * height:
+                raise ValueError("Image file is truncated")
+            # The pixel data (no copy)
+            self.data = memoryview(self._map)[offset:offset + 3 * width * height]
+        except Exception:
+            self.close()
+            raise
+
+    def row(self, y, x=0, count=None):
+        """
+        Returns a slice of a row of pixels (no copy)
+        :param y: Row
+        :param x: First column
+        :param count: Number of pixels. The default is the rest of the row.
+        :return: Memoryview of 3 bytes per pixel
+        """
+        if count is None:
+            count = self.width - x
+        start = 3 * (y * self.width + x)
+        return self.data[start:start + 3 * count]
+
+    def rows(self, y, count):
+        """
+        Returns a slice of whole rows (no copy)
+        :param y: First row
+        :param count: Number of rows
+        :return: Memoryview of 3 bytes per pixel
+        """
+        start = 3 * y * self.width
+        return self.data[start:start + 3 * count * self.width]
+
+    def close(self):
+        # The memoryview must be released before the map can be closed
+        if getattr(self, "data", None) is not None:
+            self.data.release()
+            self.data = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -0,0 +1,133 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Script import graph
+#
+
+import os
+
+
+class ImportGraph:
+    """
+    Tracks the files imported during a single compile.
+    * Resolves import file names relative to the importing file
+    or the script file directory.
+    * Keeps the current import chain so that circular imports can
+    be detected and reported.
+    * Records which file imports which (the edges of the graph).
+    * Holds the parsed statements of imported files so that a file
+    imported many times is only read and tokenized once.
+    """
+    def __init__(self, search_path=None):
+        """
+        Constructor
+        :param search_path: Directory searched for imported files that are
+        not found relative to the importing file (usually the ScriptFileDirectory).
+        """
+        self._search_path = search_path
+        # The chain of files currently being compiled (main file first)
+        self._chain = []
+        # file: [imported files]
+        self._edges = {}
+        # file: [(line-number, stmt, tokens)]
+        self._parsed = {}
+
+    def resolve(self, name, importing_file=None):
+        """
+        Resolve an import file name to a full path. A relative name is
+        looked up in this order:
+        1. The directory of the importing file
+        2. The search path directory
+        3. The current working directory
+        :param name: File name as written in the import statement
+        :param importing_file: Full path of the file containing the import statement
+        :return: Full path of the imported file or None if it does not exist
+        """
+        if os.path.isabs(name):
+            candidates = [name]
+        else:
+            candidates = []
+            if importing_file:
+                candidates.append(os.path.join(os.path.dirname(importing_file), name))
+            if self._search_path:
+                candidates.append(os.path.join(self._search_path, name))
+            candidates.append(name)
+        for c in candidates:
+            if os.path.isfile(c):
+                return os.path.abspath(c)
+        return None
+
+    @property
+    def current_file(self):
+        """
+        Returns the full path of the file currently being compiled
+        """
+        return self._chain[-1] if self._chain else None
+
+    def enter(self, path):
+        """
+        Enter (begin compiling) a file
+        :param path: Full path of the file
+        :return: None if the file can be entered. If entering the file would
+        create a cycle, returns the import chain (list of paths) ending
+        with the file.
+        """
+        if path in self._chain:
+            return self._chain[self._chain.index(path):] + [path]
+        if self._chain:
+            self._edges.setdefault(self._chain[-1], []).append(path)
+        self._chain.append(path)
+        self._edges.setdefault(path, [])
+        return None
+
+    def leave(self):
+        """
+        Leave (end compiling) the current file
+        """
+        self._chain.pop()
+
+    def is_included(self, path):
+        """
+        Answers the question: has the file been compiled during this compile?
+        :param path: Full path of the file
+        """
+        return path in self._edges
+
+    @property
+    def files(self):
+        """
+        Returns all of the files in the graph in the order they were first entered
+        """
+        return list(self._edges.keys())
+
+    def imports(self, path):
+        """
+        Returns the files directly imported by a file
+        :param path: Full path of the file
+        """
+        return list(self._edges.get(path, []))
+
+    def parsed(self, path):
+        """
+        Returns the parsed statements of a previously compiled file
+        :param path: Full path of the file
+        :return: List of (line-number, stmt, tokens) or None
+        """
+        return self._parsed.get(path)
+
+    def set_parsed(self, path, statements):
+        """
+        Save the parsed statements of a file
+        :param path: Full path of the file
+        :param statements: List of (line-number, stmt, tokens)
+        """
+        self._parsed[path] = statements
@@ -0,0 +1,171 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# 2D pixel layouts
+#
+# A layout describes how the LEDs of a matrix (a panel or a wrapped grid)
+# are wired. The algorithms draw the frame as a grid of width x height
+# pixels in row order beginning with the top left pixel. The layout's
+# index map is applied when the frame is sent to the driver.
+#
+
+import os
+import logging
+import configuration
+
+logger = logging.getLogger("led")
+
+ORIGINS = ("top-left", "top-right", "bottom-left", "bottom-right")
+ROTATIONS = (0, 90, 180, 270)
+
+
+class Layout:
+    """
+    A width x height grid of pixels and the LED that shows each pixel
+    """
+    def __init__(self, width, height, index_map):
+        """
+        Constructor
+        :param width: Grid width in pixels
+        :param height: Grid height in pixels
+        :param index_map: For each grid pixel (row order), the index of the
+        LED that shows it or None if no LED is there.
+        """
+        self.width = width
+        self.height = height
+        self.index_map = index_map
+
+    @property
+    def size(self):
+        return self.width * self.height
+
+    def output_indexes(self, num_leds):
+        """
+        Invert the index map for the driver
+        :param num_leds: Number of LEDs on the driver
+        :return: For each LED, the grid pixel that it shows. LEDs that are
+        not on the grid get the index size (one past the last pixel).
+        """
+        output = [self.size] * num_leds
+        for pixel, led in enumerate(self.index_map):
+            if led is not None and led < num_leds:
+                output[led] = pixel
+        return output
+
+
+def build_layout(width, height, serpentine=False, origin="top-left", rotation=0):
+    """
+    Build the layout of a wired panel. The LEDs are wired in rows
+    beginning at the origin corner.
+    :param width: Number of LEDs in a wired row
+    :param height: Number of wired rows
+    :param serpentine: True if every other row is wired in the opposite direction
+    :param origin: Corner where the first LED is (see ORIGINS)
+    :param rotation: Clockwise rotation of the drawn frame (0, 90, 180 or 270)
+    :return: A Layout
+    """
+    if origin not in ORIGINS:
+        raise ValueError("Invalid layout origin: {0}".format(origin))
+    if rotation not in ROTATIONS:
+        raise ValueError("Invalid layout rotation: {0}".format(rotation))
+
+    if rotation in (90, 270):
+        grid_width, grid_height = height, width
+    else:
+        grid_width, grid_height = width, height
+
+    index_map = [None] * (width * height)
+    for led in range(width * height):
+        # Position of the LED on the panel (top left is 0, 0)
+        row = led // width
+        col = led % width
+        if serpentine and row % 2:
+            col = width - 1 - col
+        if origin.endswith("right"):
+            col = width - 1 - col
+        if origin.startswith("bottom"):
+            row = height - 1 - row
+
+        # Position of the LED in the rotated frame
+        if rotation == 90:
+            x, y = row, width - 1 - col
+        elif rotation == 180:
+            x, y = width - 1 - col, height - 1 - row
+        elif rotation == 270:
+            x, y = height - 1 - row, col
+        else:
+            x, y = col, row
+        index_map[y * grid_width + x] = led
+
+    return Layout(grid_width, grid_height, index_map)
+
+
+def load_layout_map(map_file):
+    """
+    Load a layout from a coordinate map file. The file has one line per
+    LED in wiring order. Each line is the x and y grid position of the
+    LED. Blank lines and comments (#) are ignored.
+    :param map_file: Path to the map file
+    :return: A Layout
+    """
+    positions = []
+    with open(map_file, "r") as mf:
+        for line in mf:
+            tokens = line.partition("#")[0].split()
+            if not tokens:
+                continue
+            if len(tokens) != 2:
+                raise ValueError("Invalid layout map line: {0}".format(line.strip()))
+            positions.append((int(tokens[0]), int(tokens[1])))
+    if not positions:
+        raise ValueError("Layout map file is empty: {0}".format(map_file))
+
+    width = max(x for x, y in positions) + 1
+    height = max(y for x, y in positions) + 1
+    index_map = [None] * (width * height)
+    for led, (x, y) in enumerate(positions):
+        if x < 0 or y < 0:
+            raise ValueError("Invalid layout map position: {0} {1}".format(x, y))
+        if index_map[y * width + x] is not None:
+            raise ValueError("Duplicate layout map position: {0} {1}".format(x, y))
+        index_map[y * width + x] = led
+
+    return Layout(width, height, index_map)
+
+
+def create_layout(num_leds):
+    """
+    Create the configured layout
+    :param num_leds: Number of LEDs on the driver
+    :return: A Layout or None if the LEDs are a strip (no layout is configured)
+    """
+    try:
+        map_file = configuration.Configuration.LayoutMap()
+        if map_file:
+            layout = load_layout_map(os.path.expanduser(map_file))
+        else:
+            width = configuration.Configuration.LayoutWidth()
+            if width <= 0:
+                return None
+            height = configuration.Configuration.LayoutHeight()
+            if height <= 0:
+                height = max(num_leds // width, 1)
+            layout = build_layout(width, height,
+                                  serpentine=configuration.Configuration.LayoutSerpentine(),
+                                  origin=configuration.Configuration.LayoutOrigin(),
+                                  rotation=configuration.Configuration.LayoutRotation())
+    except Exception as ex:
+        logger.error("Unable to create the pixel layout: %s", str(ex))
+        return None
+
+    logger.info("Pixel layout is %d x %d", layout.width, layout.height)
+    return layout
@@ -18,6 +18,7 @@
 import app_logger
 import configuration
 import engine.led_engine
+import engine.frame_cache
 import os
 import glob
 import json
@@ -62,7 +63,10 @@ class LEDCommandHandler:
     Recognized commands
         status
         scriptfiles
-        start <script-name>
+        start <script-name> [name=value...]
+        run <algorithm-statement>
+        validate
+        watch [on | off]
         stop
         quit
         close
@@ -116,6 +120,9 @@ class LEDCommandHandler:
         self._valid_commands = {
             "scriptfiles": self.get_script_files,
             "start": self.start_script,
+            "run": self.run_statement,
+            "validate": self.validate_scripts,
+            "watch": self.watch_scripts,
             "stop": self.stop_script,
             "shutdown": self.shutdown_controller,
             "status": self.get_status,
@@ -182,9 +189,13 @@ class LEDCommandHandler:
         if LEDCommandHandler.led_engine.Running():
             r.set_state(LEDCommandHandler.STATUS_RUNNING)
             r.set_value("scriptfile", LEDCommandHandler.led_script)
+            r.set_value("watching", LEDCommandHandler.led_engine.watching)
         else:
             r.set_state(LEDCommandHandler.STATUS_STOPPED)
 
+        # Rendered frame cache hit/miss counters
+        r.set_value("framecache", engine.frame_cache.get_frame_cache().statistics())
+
         return r
 
     def get_script_files(self, tokens, command):
@@ -203,6 +214,29 @@ class LEDCommandHandler:
             names.append(os.path.split(f)[1])
 
         r.set_value("scriptfiles", names)
+
+        # Results of the last validation pass (if any)
+        validator = LEDCommandHandler.led_engine.script_validator
+        results = validator.results
+        if results:
+            r.set_value("validation", {name: results[name] for name in names if name in results})
+        r.set_value("validating", validator.validating)
+        return r
+
+    def validate_scripts(self, tokens, command):
+        """
+        Validate (compile) all of the script files in the script file directory.
+        Validation runs in the background. The results are reported
+        by the scriptfiles command.
+        :param tokens:
+        :param command:
+        :return:
+        """
+        r = LEDCommandHandler.Response(tokens[0], result=LEDCommandHandler.OK_RESPONSE)
+
+        if not LEDCommandHandler.led_engine.validate_scripts():
+            r.set_value("messages", ["Validation is already running"])
+        r.set_value("validating", True)
         return r
 
     def close_connection(self, tokens, command):
@@ -230,10 +264,33 @@ class LEDCommandHandler:
         r = LEDCommandHandler.Response(tokens[0], result=LEDCommandHandler.OK_RESPONSE, state=LEDCommandHandler.STATUS_CLOSED)
         return r
 
+    def watch_scripts(self, tokens, command):
+        """
+        Turn hot reload on or off. When on, the running script is
+        recompiled and reloaded when its script file or any file
+        it imports changes.
+        :param tokens: tokens[1] is on or off. If omitted, the current
+        setting is returned.
+        :param command:
+        :return:
+        """
+        r = LEDCommandHandler.Response(tokens[0], result=LEDCommandHandler.OK_RESPONSE)
+
+        if len(tokens) >= 2:
+            if tokens[1] not in ["on", "off"]:
+                r.set_result(LEDCommandHandler.ERROR_RESPONSE)
+                r.set_value("messages", ["Watch argument must be on or off"])
+                return r
+            LEDCommandHandler.led_engine.watch = tokens[1] == "on"
+
+        r.set_value("watch", "on" if LEDCommandHandler.led_engine.watch else "off")
+        return r
+
     def start_script(self, tokens, command):
         """
         Start the LED engine running a script file
-        :param tokens: tokens[1] is the script file name
+        :param tokens: tokens[1] is the script file name. tokens[2:] are
+        optional script parameters of the form name=value.
         :param command:
         :return:
         """
@@ -246,6 +303,13 @@ class LEDCommandHandler:
             r.set_value("messages", ["Missing script file name argument"])
             return r
 
+        # Script parameters override define/color statements in the script
+        parameters = LEDCommandHandler.parse_parameters(tokens[2:])
+        if parameters is None:
+            r.set_result(LEDCommandHandler.ERROR_RESPONSE)
+            r.set_value("messages", ["Script parameters must be of the form name=value"])
+            return r
+
         # Full path to script file
         # TODO Concurrency issue
         r.set_value("scriptfile", tokens[1])
@@ -264,7 +328,7 @@ class LEDCommandHandler:
         LEDCommandHandler.stop_engine()
 
         # Compile the script
-        if LEDCommandHandler.led_engine.compile(full_path):
+        if LEDCommandHandler.led_engine.compile(full_path, parameters=parameters):
             LEDCommandHandler.led_script = tokens[1]
         else:
             r.set_result(LEDCommandHandler.ERROR_RESPONSE)
@@ -284,6 +348,63 @@ class LEDCommandHandler:
 
         return r
 
+    def run_statement(self, tokens, command):
+        """
+        Start the LED engine running a single algorithm statement.
+        No script file is involved. The statement runs until stopped.
+        :param tokens: tokens[1:] is the algorithm statement (e.g. solidcolor orange 1000)
+        :param command:
+        :return:
+        """
+        r = LEDCommandHandler.Response(tokens[0], result=LEDCommandHandler.OK_RESPONSE)
+
+        # The statement is required
+        if len(tokens) < 2:
+            r.set_result(LEDCommandHandler.ERROR_RESPONSE)
+            r.set_value("messages", ["Missing statement argument"])
+            return r
+
+        stmt = " ".join(tokens[1:])
+        r.set_value("statement", stmt)
+
+        # Stop a running script
+        LEDCommandHandler.stop_engine()
+
+        # Compile the statement
+        if LEDCommandHandler.led_engine.compile_immediate(stmt):
+            LEDCommandHandler.led_script = "run " + stmt
+        else:
+            r.set_result(LEDCommandHandler.ERROR_RESPONSE)
+            r.set_state(LEDCommandHandler.STATUS_STOPPED)
+            r.set_value("messages", LEDCommandHandler.led_engine.last_error)
+            return r
+
+        # Execute the compiled statement on the LED engine thread
+        if not LEDCommandHandler.led_engine.execute():
+            r.set_result(LEDCommandHandler.ERROR_RESPONSE)
+            r.set_state(LEDCommandHandler.STATUS_STOPPED)
+            r.set_value("messages", ["Statement failed to start"])
+            return r
+
+        r.set_state(LEDCommandHandler.STATUS_RUNNING)
+
+        return r
+
+    @staticmethod
+    def parse_parameters(tokens):
+        """
+        Parse script parameter tokens
+        :param tokens: List of name=value tokens
+        :return: Dict of parameters (name: value) or None if a token is invalid
+        """
+        parameters = {}
+        for t in tokens:
+            name, sep, value = t.partition("=")
+            if not sep or not name or not value:
+                return None
+            parameters[name] = value
+        return parameters
+
     def stop_script(self, tokens, command):
         """
         Stop any running script. If no script is running,
@@ -15,7 +15,8 @@
 
 from . import led_engine_thread
 from . import script_vm
-from . import script_compiler
+from . import script_cache
+import configuration
 import app_trace
 import logging
 import sys
@@ -30,6 +31,12 @@ class LEDEngine:
         self._vm = None
         self._compiler = None
         self._last_error = None
+        # Compiled VMs keyed by script file and parameters
+        self._cache = None
+        self._validator = None
+        # Hot reload
+        self._watch = None
+        self._watcher = None
 
     @property
     def last_error(self):
@@ -39,18 +46,183 @@ class LEDEngine:
         """
         return self._last_error
 
-    def compile(self, script_file):
+    @property
+    def script_cache(self):
+        """
+        Returns the compiled script cache. The cache is created on first use
+        because the configuration is not loaded when the engine is constructed.
+        :return:
+        """
+        if self._cache is None:
+            self._cache = script_cache.ScriptCache(
+                max_entries=configuration.Configuration.ScriptCacheSize())
+        return self._cache
+
+    @property
+    def script_validator(self):
+        """
+        Returns the script directory validator. Validated scripts
+        are added to the compiled script cache.
+        :return:
+        """
+        if self._validator is None:
+            # The validator (and its process pool) is only imported when it is used
+            from . import script_validator
+            self._validator = script_validator.ScriptValidator(cache=self.script_cache)
+        return self._validator
+
+    def validate_scripts(self):
+        """
+        Start validating all of the script files in the script file directory.
+        Validation runs in the background.
+        :return: True if validation started. False if validation is already running.
+        """
+        return self.script_validator.start(configuration.Configuration.ScriptFileDirectory())
+
+    @property
+    def watch(self):
+        """
+        Returns True if the running script is reloaded when its source files change
+        :return:
+        """
+        if self._watch is None:
+            self._watch = configuration.Configuration.WatchScripts()
+        return self._watch
+
+    @watch.setter
+    def watch(self, value):
+        """
+        Turn hot reload of the running script on or off
+        :param value: True or False
+        :return:
+        """
+        self._watch = value
+        if value and self.Running():
+            self._start_watcher()
+        elif not value:
+            self._stop_watcher()
+
+    @property
+    def watching(self):
+        """
+        Returns True if the running script's source files are being watched
+        :return:
+        """
+        return self._watcher is not None and self._watcher.is_alive()
+
+    def compile(self, script_file, parameters=None):
+        """
+        Compile a script file. If the script has already been compiled
+        with the same parameters and neither the script file nor any
+        of its imported files has changed, the cached VM is used.
+        :param script_file: Full path to the script file
+        :param parameters: Dict of script parameters (name: value)
+        :return: True if the script compiled
+        """
+        vm, errors = self._compile_script(script_file, parameters)
+        if vm is None:
+            self._last_error = errors
+            return False
+        self._vm = vm
+        return True
+
+    def _compile_script(self, script_file, parameters):
+        """
+        Compile a script file (or get it from the cache)
+        :param script_file: Full path to the script file
+        :param parameters: Dict of script parameters (name: value)
+        :return: A tuple (vm, errors). vm is None if the script did not compile.
+        """
+        cache_key = self.script_cache.key(script_file, parameters)
+        vm = self.script_cache.get(cache_key)
+        if vm is not None:
+            logger.info("Using cached compile of script %s", script_file)
+            return vm, None
+
+        # A fresh compiled script file avoids compiling altogether
+        from . import compiled_script
+        loaded = compiled_script.load(script_file, parameters)
+        if loaded is not None:
+            self.script_cache.put(cache_key, loaded[0], fingerprints=loaded[1])
+            logger.info("Loaded compiled script for %s", script_file)
+            return loaded[0], None
+
+        # The compiler is only needed (imported) when a script must be compiled
+        from . import script_compiler
+
         # Create a VM instance
-        self._vm = script_vm.ScriptVM(script_file)
+        vm = script_vm.ScriptVM(script_file, parameters=parameters)
 
         # Compile the script (pass 1) of the current (main) thread
+        # Imported files are also looked up in the script file directory
+        compiler = script_compiler.ScriptCompiler(
+            vm, search_path=configuration.Configuration.ScriptFileDirectory())
+        if not compiler.compile(script_file):
+            return None, compiler.last_error
+
+        fingerprints = script_cache.ScriptCache.source_fingerprints(vm)
+        if fingerprints is not None:
+            self.script_cache.put(cache_key, vm, fingerprints=fingerprints)
+            compiled_script.save(vm, fingerprints)
+        logger.info("Successfully compiled script %s", script_file)
+        return vm, None
+
+    def reload(self):
+        """
+        Recompile the running script and swap it into the engine thread.
+        Called by the script watcher on its own thread. If the script
+        does not compile, the running script is left as it is.
+        :return: The new VM or None if the script did not compile
+        """
+        engine_thread = self.engine_thread
+        if engine_thread is None or engine_thread.is_terminated:
+            return None
+        running_vm = engine_thread.vm
+        vm, errors = self._compile_script(running_vm.script_file, running_vm.parameters)
+        if vm is None:
+            self._last_error = errors
+            return None
+        engine_thread.SwapVM(vm)
+        self._vm = vm
+        logger.info("Reloaded script %s", running_vm.script_file)
+        return vm
+
+    def _start_watcher(self):
+        """
+        Start watching the source files of the running script.
+        Immediate statements have no source files.
+        :return:
+        """
+        if self.watching or not self.engine_thread.vm.source_files:
+            return
+        from . import script_watcher
+        self._watcher = script_watcher.ScriptWatcher(
+            self.engine_thread.vm, self.reload,
+            interval=configuration.Configuration.WatchInterval())
+        self._watcher.start()
+
+    def _stop_watcher(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def compile_immediate(self, stmt):
+        """
+        Compile a single algorithm statement to be run immediately.
+        There is no script file involved.
+        :param stmt: The statement text (e.g. solidcolor orange 1000)
+        :return: True if the statement compiled
+        """
+        from . import script_compiler
+
+        self._vm = script_vm.ScriptVM("<run>")
         self._compiler = script_compiler.ScriptCompiler(self._vm)
-        rc = self._compiler.compile(script_file)
+        rc = self._compiler.compile_immediate(stmt)
         if not rc:
             self._last_error = self._compiler.last_error
             return rc
 
-        logger.info("Successfully compiled script %s", script_file)
+        logger.info("Successfully compiled statement %s", stmt)
         return rc
 
     def execute(self):
@@ -60,8 +232,12 @@ class LEDEngine:
         """
         #
         try:
+            # A script that ended on its own leaves its watcher running
+            self._stop_watcher()
             self.engine_thread = led_engine_thread.LEDEngineThread(1, "LEDEngineThread", self._vm)
             self.engine_thread.start()
+            if self.watch:
+                self._start_watcher()
         except Exception as e:
             logger.error("Unhandled exception starting LED engine")
             logger.error(e)
@@ -75,6 +251,8 @@ class LEDEngine:
         Stops the script engine thread
         :return:
         """
+        # Stop watching first so that a reload cannot restart the script
+        self._stop_watcher()
         if self.engine_thread is not None:
             self.engine_thread.Terminate()
 
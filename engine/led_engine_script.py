@@ -15,10 +15,10 @@
 #
 
 import logging
+import threading
 import configuration
-from . import script_vm
-from . import script_compiler
 from . import script_cpu_led
+from .frame_buffer import create_frame_buffer
 import driver.manager
 
 logger = logging.getLogger("led")
@@ -32,9 +32,15 @@ class LEDEngineScript():
         :return:
         """
         self._dev = None
+        self._frame = None
         self._vm = vm
         self._terminate_signal = terminate_signal
-        pass
+        # Stops the current CPU (terminate or swap)
+        self._cpu_stop = threading.Event()
+        self._cpu = None
+        # VM waiting to be swapped in
+        self._pending_vm = None
+        self._lock = threading.Lock()
 
     def initialize(self):
         """
@@ -45,6 +51,8 @@ class LEDEngineScript():
 
         # Get the singleton instance of the LED interface driver
         self._dev = driver.manager.get_driver()
+        # The frame buffer is kept when a new VM is swapped in
+        self._frame = create_frame_buffer(self._dev)
         return True
 
     def execute(self):
@@ -53,15 +61,51 @@ class LEDEngineScript():
         :return:
         """
 
-        cpu = script_cpu_led.ScriptCPULED(self._dev, self._vm, self._terminate_signal)
-        rc = cpu.run()
+        while True:
+            with self._lock:
+                self._cpu = script_cpu_led.ScriptCPULED(self._dev, self._vm, self._cpu_stop,
+                                                        frame_buffer=self._frame)
+            rc = self._cpu.run()
+
+            with self._lock:
+                if self._pending_vm is None or self._terminate_signal.isSet():
+                    break
+                # Swap in the new VM and run it from the start
+                self._vm = self._pending_vm
+                self._pending_vm = None
+                self._cpu_stop.clear()
+            logger.info("Engine swapped in script file %s", self._vm.script_file)
 
         self.shutdown()
         return rc
 
+    def swap(self, vm):
+        """
+        Replace the running VM. The current CPU stops at its next frame
+        boundary (the same point where it checks for termination) and
+        the new VM is run without resetting the LEDs.
+        :param vm: The new compiled VM
+        :return: None
+        """
+        with self._lock:
+            self._pending_vm = vm
+            if self._cpu is not None:
+                self._cpu.reset_at_end = False
+            self._cpu_stop.set()
+
+    def stop(self):
+        """
+        Stop the running VM (and any swap)
+        :return: None
+        """
+        with self._lock:
+            self._terminate_signal.set()
+            self._cpu_stop.set()
+
     def shutdown(self):
         """
         Shutdown the script engine
         :return:
         """
         self._dev = None
+        self._frame = None
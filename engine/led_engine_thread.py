@@ -58,13 +58,23 @@ class LEDEngineThread(threading.Thread):
     ########################################################################
     # Terminate the engine thread. Called on the main thread.
     def Terminate(self):
-        self.terminate_signal.set()
+        self._script.stop()
         # wait for engine thread to exit - could be a while
         logger.info("Waiting for engine thread to stop...this could take a few seconds")
         # This waits until the engine thread has stopped
         self.join()
         logger.info("Engine thread stopped")
 
+    ########################################################################
+    # Swap a new VM into the running script. Called on any thread.
+    def SwapVM(self, vm):
+        self._vm = vm
+        self._script.swap(vm)
+
+    @property
+    def vm(self):
+        return self._vm
+
     @property
     def is_terminated(self):
         return self.terminate_signal.isSet()
@@ -0,0 +1,106 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# NumPy frame buffer
+#
+
+import numpy
+from .frame_buffer import FrameBuffer
+
+
+class NumpyFrameBuffer(FrameBuffer):
+    """
+    Frame buffer backed by an (N, 3) uint8 NumPy array.
+    Color tables are (K, 3) uint8 arrays and index lists are
+    integer arrays, so every operation is a whole-array operation.
+    """
+    def __init__(self, leddev, layout=None):
+        FrameBuffer.__init__(self, leddev, layout=layout)
+        self.pixels = numpy.zeros((self.num_pixels, 3), dtype=numpy.uint8)
+
+    @staticmethod
+    def table(colors):
+        return numpy.array(colors, dtype=numpy.uint8).reshape(-1, 3)
+
+    @staticmethod
+    def indexes(index_list):
+        return numpy.array(index_list, dtype=numpy.intp)
+
+    def clear(self):
+        self.pixels[:] = 0
+
+    def fill(self, rgb):
+        self.pixels[:] = rgb
+
+    def fill_range(self, rgb, start=0, stop=None, step=1):
+        self.pixels[start:stop:step] = rgb
+
+    def fill_pattern(self, table):
+        # resize() repeats the pattern as many times as needed
+        self.pixels[:] = numpy.resize(table, self.pixels.shape)
+
+    def get_pixel(self, index):
+        return tuple(int(v) for v in self.pixels[index])
+
+    def set_pixel(self, index, rgb):
+        self.pixels[index] = rgb
+
+    def set_pixels(self, colors):
+        self.pixels[:] = colors
+
+    def write(self, data, start=0):
+        # Data past the end of the frame is dropped
+        flat = self.pixels.reshape(-1)
+        count = min(len(data), flat.size - 3 * start)
+        if count > 0:
+            flat[3 * start:3 * start + count] = numpy.frombuffer(data, dtype=numpy.uint8, count=count)
+
+    def gather(self, table, indexes, offset=0):
+        if offset:
+            self.pixels[:] = table[(indexes + offset) % len(table)]
+        else:
+            self.pixels[:] = table[indexes]
+
+    def rotate(self, n):
+        self.pixels[:] = numpy.roll(self.pixels, n, axis=0)
+
+    def keep_every(self, start, step):
+        kept = self.pixels[start::step].copy()
+        self.pixels[:] = 0
+        self.pixels[start::step] = kept
+
+    def snapshot(self):
+        frame = self.pixels.copy()
+        frame.flags.writeable = False
+        return frame, frame.nbytes
+
+    def restore(self, snapshot):
+        self.pixels[:] = snapshot
+
+    def blend(self, snapshot1, snapshot2, fraction):
+        # 8.8 fixed point weights
+        w = int(fraction * 256 + 0.5)
+        mixed = snapshot1.astype(numpy.uint16) * (256 - w) + snapshot2.astype(numpy.uint16) * w
+        self.pixels[:] = mixed >> 8
+
+    def rgb(self):
+        return self.pixels
+
+    def colors(self, tables=None, shifts=None):
+        p = self.pixels
+        if tables is not None:
+            # One lookup for all the pixels of all three channels
+            lut = numpy.frombuffer(b"".join(tables), dtype=numpy.uint8).reshape(3, 256)
+            p = lut[numpy.arange(3), p]
+        p = p.astype(numpy.uint32)
+        r_shift, g_shift, b_shift = shifts if shifts is not None else self._shifts
+        return ((p[:, 0] << r_shift) | (p[:, 1] << g_shift) | (p[:, 2] << b_shift)).tolist()
@@ -0,0 +1,209 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Output pipeline
+#
+# The output pipeline sits between the frame buffer and every driver.
+# Its stages are:
+#
+#   gamma, white balance and brightness - folded into one 256 entry lookup
+#       table per channel, so a frame costs one lookup per pixel channel
+#       no matter how many of them are in use
+#   power limiting - see PowerLimiter
+#   dithering - see engine/precise_output.py
+#   color order - folded into the packing of the driver's color values
+#   reversal - the LED order is reversed
+#
+# The drivers run at full brightness, the pipeline applies brightness.
+# Without dithering or power limiting, the tables are 8 bit and the frame
+# buffer applies them as it packs the frame (no third party packages).
+# Dithering and power limiting use 16 bit tables and require NumPy.
+#
+
+import logging
+import weakref
+import configuration
+
+logger = logging.getLogger("led")
+
+# The brightness last set for each driver. The driver outlives the frame
+# buffer (and pipeline) of each script, so a brightness statement carries
+# over to the next script as it did when the driver applied brightness.
+_driver_brightness = weakref.WeakKeyDictionary()
+
+# 16 bit full scale
+FULL = 65535
+CHANNELS = "rgb"
+
+
+def build_tables(gamma=1.0, white_balance=(255, 255, 255), brightness=255):
+    """
+    Fold gamma, white balance and brightness into lookup tables
+    :param gamma: Gamma exponent (1.0 is no correction)
+    :param white_balance: Maximum value (0-255) of r, g and b
+    :param brightness: 0-255
+    :return: One list of 256 16 bit values per channel (r, g, b)
+    """
+    curve = [(v / 255.0) ** gamma for v in range(256)]
+    tables = []
+    for c in range(3):
+        scale = FULL * (white_balance[c] / 255.0) * (brightness / 255.0)
+        tables.append([int(round(scale * v)) for v in curve])
+    return tables
+
+
+class PowerLimiter:
+    """
+    Estimates the current a frame draws and the factor that keeps it
+    within the power supply budget
+    """
+    def __init__(self, num_leds, channel_current, idle_current, budget):
+        """
+        Constructor
+        :param num_leds: Number of LEDs on the string
+        :param channel_current: mA drawn by one channel (r, g or b) at full
+        :param idle_current: mA drawn by one LED when it is off
+        :param budget: mA the power supply can deliver
+        """
+        self.channel_current = float(channel_current)
+        self.idle = num_leds * float(idle_current)
+        self.budget = float(budget)
+        # A scaled frame is rounded (or dithered) to 8 bits, which can add up
+        # to one step to every channel. The scale leaves room for it.
+        self.headroom = num_leds * 3 * self.channel_current / 255.0
+        # Frames that were scaled down
+        self.limited_frames = 0
+
+    def current(self, total):
+        """
+        Returns the estimated mA for a frame
+        :param total: Sum of all channel values of the frame (16 bit units)
+        """
+        return self.idle + self.channel_current * total / FULL
+
+    def factor(self, total):
+        """
+        Returns the factor that brings a frame within the budget
+        :param total: Sum of all channel values of the frame (16 bit units)
+        :return: 0.0-1.0 or None if the frame is within the budget
+        """
+        draw = self.current(total)
+        if draw <= self.budget:
+            return None
+        self.limited_frames += 1
+        return max(self.budget - self.headroom - self.idle, 0.0) / (draw - self.idle)
+
+
+class OutputPipeline:
+    """
+    Processes frames between the frame buffer and the driver
+    """
+    def __init__(self, num_pixels, shifts, gamma=1.0, white_balance=(255, 255, 255),
+                 color_order="rgb", reverse=False, precise=None, leddev=None):
+        """
+        Constructor
+        :param num_pixels: Number of pixels in a frame
+        :param shifts: Bit positions of r, g and b in the driver's color format
+        :param gamma: Gamma exponent (1.0 is no correction)
+        :param white_balance: Maximum value (0-255) of r, g and b
+        :param color_order: The order r, g and b are sent to the driver
+        :param reverse: True to reverse the order of the LEDs
+        :param precise: A PreciseOutput for the 16 bit stages or None
+        :param leddev: The driver whose brightness is remembered or None
+        """
+        self.num_pixels = num_pixels
+        self.reverse = reverse
+        self._gamma = gamma
+        self._white_balance = tuple(white_balance)
+        self._leddev = leddev
+        self._brightness = _driver_brightness.get(leddev, 255) if leddev is not None else 255
+        self._precise = precise
+        # Each channel goes to the driver slot the color order puts it in
+        self._shifts = [shifts[color_order.index(CHANNELS[c])] for c in range(3)]
+        self._tables = None
+        self._build()
+
+    def _build(self):
+        """
+        Build the lookup tables for the current settings
+        """
+        tables = build_tables(self._gamma, self._white_balance, self._brightness)
+        if self._precise is not None:
+            self._precise.set_tables(tables)
+        elif self._gamma == 1.0 and self._white_balance == (255, 255, 255) and self._brightness == 255:
+            # Nothing to look up
+            self._tables = None
+        else:
+            self._tables = [bytes([(v + 128) // 257 for v in table]) for table in tables]
+
+    def set_brightness(self, brightness):
+        """
+        Set the brightness the pipeline applies
+        :param brightness: 0-255
+        :return: True (the pipeline applies brightness, the driver should not)
+        """
+        brightness = min(max(int(brightness), 0), 255)
+        if self._leddev is not None:
+            _driver_brightness[self._leddev] = brightness
+        if brightness != self._brightness:
+            self._brightness = brightness
+            self._build()
+        return True
+
+    def process(self, frame_buffer):
+        """
+        Process a frame
+        :param frame_buffer: The frame buffer
+        :return: List of num_pixels color values in the driver's color format
+        """
+        if self._precise is not None:
+            return self._precise.process(frame_buffer.rgb(), self._shifts)
+        return frame_buffer.colors(self._tables, self._shifts)
+
+
+def create_output_pipeline(leddev, num_pixels, shifts):
+    """
+    Create the configured output pipeline
+    :param leddev: The LED device driver
+    :param num_pixels: Number of pixels in a frame
+    :param shifts: Bit positions of r, g and b in the driver's color format
+    :return: An OutputPipeline
+    """
+    dithering = configuration.Configuration.Dithering()
+    budget = configuration.Configuration.PowerBudget()
+    precise = None
+    if dithering or budget > 0:
+        try:
+            from .precise_output import PreciseOutput
+            limiter = None
+            if budget > 0:
+                limiter = PowerLimiter(leddev.numPixels(),
+                                       configuration.Configuration.PowerChannelCurrent(),
+                                       configuration.Configuration.PowerIdleCurrent(),
+                                       budget)
+                logger.info("Output pipeline: power is limited to %d mA", budget)
+            if dithering:
+                logger.info("Output pipeline: temporal dithering is on")
+            precise = PreciseOutput(num_pixels, dithering=dithering, limiter=limiter)
+        except ImportError:
+            logger.error("NumPy is not installed, dithering and power limiting are off")
+
+    pipeline = OutputPipeline(num_pixels, shifts,
+                              gamma=configuration.Configuration.Gamma(),
+                              white_balance=configuration.Configuration.WhiteBalance(),
+                              color_order=configuration.Configuration.OutputColorOrder(),
+                              reverse=configuration.Configuration.Reverse(),
+                              precise=precise,
+                              leddev=leddev)
+    # The pipeline applies brightness, so the driver runs at full brightness
+    leddev.setBrightness(255)
+    return pipeline
@@ -0,0 +1,41 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Gradient palettes
+#
+
+PALETTE_SIZE = 256
+
+
+def build_palette(stops, size=PALETTE_SIZE):
+    """
+    Build a gradient palette lookup table. The color stops are spread
+    evenly over the table (the first stop is entry 0, the last stop is
+    the last entry) and the colors between stops are linearly interpolated.
+    :param stops: List of one or more colors (r, g, b)
+    :param size: Number of entries in the table
+    :return: List of size colors (r, g, b)
+    """
+    if len(stops) == 1:
+        return [tuple(stops[0])] * size
+
+    segments = len(stops) - 1
+    table = []
+    for i in range(size):
+        # Position of the entry along the gradient (0.0 - segments)
+        position = i * segments / (size - 1)
+        s = min(int(position), segments - 1)
+        f = position - s
+        c1 = stops[s]
+        c2 = stops[s + 1]
+        table.append(tuple(int(round(c1[c] + (c2[c] - c1[c]) * f)) for c in range(3)))
+    return table
@@ -0,0 +1,253 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Particle effects
+#
+# A particle system keeps its particles as parallel NumPy arrays
+# (position, velocity, color, life), so every frame updates and draws
+# all of the particles with a handful of array operations. The particle
+# effects are pixel generators (see engine/generator_registry.py).
+# This module requires NumPy.
+#
+
+import numpy
+from .pixel_generator import PixelGenerator
+from .script_cpu_led import ScriptCPULED
+
+# Rainbow colors for particles without a given color
+_wheel = numpy.array([ScriptCPULED.wheel_rgb(pos) for pos in range(256)], dtype=numpy.float32)
+
+
+class ParticleSystem:
+    """
+    A fixed number of particle slots along a strip of pixels. Positions
+    and velocities are in pixels (per frame). A particle is alive while
+    its life (frames) is greater than zero.
+    """
+    def __init__(self, num_pixels, capacity=1000, trail=0.0, drag=1.0, gravity=0.0, twinkle=False):
+        """
+        Constructor
+        :param num_pixels: Number of pixels
+        :param capacity: Maximum number of live particles
+        :param trail: 0.0-1.0 How much of the previous frame is kept (0 is no trail)
+        :param drag: Velocity is multiplied by drag every frame
+        :param gravity: Added to the velocity every frame
+        :param twinkle: If True, particles brighten and then fade over their life.
+        Otherwise, they fade from full brightness.
+        """
+        self.num_pixels = num_pixels
+        self.trail = trail
+        self.drag = drag
+        self.gravity = gravity
+        self.twinkle = twinkle
+        self.position = numpy.zeros(capacity, dtype=numpy.float32)
+        self.velocity = numpy.zeros(capacity, dtype=numpy.float32)
+        self.color = numpy.zeros((capacity, 3), dtype=numpy.float32)
+        self.life = numpy.zeros(capacity, dtype=numpy.float32)
+        self.max_life = numpy.ones(capacity, dtype=numpy.float32)
+        # The frame is accumulated in floats so that particles add up
+        self._canvas = numpy.zeros((num_pixels, 3), dtype=numpy.float32)
+
+    @property
+    def count(self):
+        """
+        Returns the number of live particles
+        """
+        return int(numpy.count_nonzero(self.life > 0))
+
+    def emit(self, count, position, velocity, color, life):
+        """
+        Add particles. Each argument is a value for all of the new particles
+        or an array with one value per particle. If there are not enough free
+        slots, fewer particles are added.
+        :param count: Number of particles
+        :param position: Position (pixels)
+        :param velocity: Velocity (pixels per frame)
+        :param color: Color (r, g, b) or (count, 3) array
+        :param life: Life (frames)
+        :return: Number of particles added
+        """
+        slots = numpy.flatnonzero(self.life <= 0)[:count]
+        n = len(slots)
+        if n == 0:
+            return 0
+        self.position[slots] = numpy.broadcast_to(position, (count,))[:n]
+        self.velocity[slots] = numpy.broadcast_to(velocity, (count,))[:n]
+        self.color[slots] = numpy.broadcast_to(color, (count, 3))[:n]
+        self.life[slots] = numpy.broadcast_to(life, (count,))[:n]
+        self.max_life[slots] = self.life[slots]
+        return n
+
+    def update(self):
+        """
+        Move and age all particles. Particles that leave the strip die.
+        """
+        self.velocity *= self.drag
+        self.velocity += self.gravity
+        self.position += self.velocity
+        self.life -= 1
+        gone = (self.position < 0) | (self.position > self.num_pixels - 1)
+        self.life[gone] = 0
+
+    def splat(self, frame_buffer):
+        """
+        Draw the live particles in a frame buffer. A particle between two pixels
+        is split between them and overlapping particles add up.
+        :param frame_buffer: The frame buffer
+        :return: None
+        """
+        self._canvas *= self.trail
+        alive = self.life > 0
+        if alive.any():
+            position = self.position[alive]
+            fraction = self.life[alive] / self.max_life[alive]
+            if self.twinkle:
+                fraction = 1.0 - numpy.abs(2.0 * fraction - 1.0)
+            colors = self.color[alive] * fraction[:, None]
+
+            left = numpy.floor(position).astype(numpy.intp)
+            weight = (position - left)[:, None]
+            right = numpy.minimum(left + 1, self.num_pixels - 1)
+            numpy.add.at(self._canvas, left, colors * (1.0 - weight))
+            numpy.add.at(self._canvas, right, colors * weight)
+
+        frame = numpy.clip(self._canvas, 0, 255).astype(numpy.uint8)
+        frame_buffer.write(frame.tobytes())
+
+    def clear(self):
+        self.life[:] = 0
+        self._canvas[:] = 0
+
+
+class ParticleGenerator(PixelGenerator):
+    """
+    Base class for the particle effects. A subclass adds particles in emit().
+    """
+    def __init__(self, num_pixels=0, capacity=1000, trail=0.0, drag=1.0, gravity=0.0, twinkle=False, seed=None):
+        super(ParticleGenerator, self).__init__(num_pixels=num_pixels)
+        self.particles = ParticleSystem(num_pixels, capacity=int(capacity), trail=trail,
+                                        drag=drag, gravity=gravity, twinkle=twinkle)
+        self.random = numpy.random.default_rng(seed)
+
+    def start(self):
+        self.particles.clear()
+
+    def random_colors(self, count, color=None):
+        """
+        Returns a (count, 3) array of the given color or of random rainbow colors
+        """
+        if color is not None:
+            return numpy.broadcast_to(numpy.array(color, dtype=numpy.float32), (count, 3))
+        return _wheel[self.random.integers(0, 256, count)]
+
+    def random_count(self, rate):
+        """
+        Returns the number of particles to add this frame for an average rate per frame
+        """
+        return int(self.random.poisson(rate))
+
+    def emit(self, t):
+        pass
+
+    def render(self, frame_buffer, t):
+        self.emit(t)
+        self.particles.update()
+        self.particles.splat(frame_buffer)
+
+
+class FireworksGenerator(ParticleGenerator):
+    """
+    Bursts of particles that fly apart, slow down and fade.
+    """
+    def __init__(self, num_pixels=0, color=None, rate=0.05, burst=40, speed=1.5, life=40,
+                 trail=0.6, drag=0.92, capacity=1000, seed=None):
+        super(FireworksGenerator, self).__init__(num_pixels=num_pixels, capacity=capacity,
+                                                 trail=trail, drag=drag, seed=seed)
+        self.color = color
+        self.rate = rate
+        self.burst = int(burst)
+        self.speed = speed
+        self.life = life
+
+    def emit(self, t):
+        for b in range(self.random_count(self.rate)):
+            position = self.random.uniform(0, self.num_pixels - 1)
+            color = self.random_colors(1, self.color)[0]
+            self.particles.emit(self.burst, position,
+                                self.random.uniform(-self.speed, self.speed, self.burst),
+                                color,
+                                self.random.uniform(self.life / 2, self.life, self.burst))
+
+
+class CometGenerator(ParticleGenerator):
+    """
+    A comet head moves along the strip leaving a tail of sparks.
+    """
+    def __init__(self, num_pixels=0, color=(255, 96, 0), rate=3.0, speed=1.0, life=20,
+                 trail=0.5, drag=0.9, capacity=1000, seed=None):
+        super(CometGenerator, self).__init__(num_pixels=num_pixels, capacity=capacity,
+                                             trail=trail, drag=drag, seed=seed)
+        self.color = color
+        self.rate = rate
+        self.speed = speed
+        self.life = life
+
+    def emit(self, t):
+        head = (t * self.speed) % max(self.num_pixels - 1, 1)
+        count = self.random_count(self.rate) + 1
+        # The sparks drift back from the head
+        self.particles.emit(count, head,
+                            self.random.uniform(-0.5 * self.speed, 0.0, count),
+                            self.random_colors(count, self.color),
+                            self.random.uniform(self.life / 2, self.life, count))
+
+
+class TwinkleGenerator(ParticleGenerator):
+    """
+    Pixels light up and fade out at random.
+    """
+    def __init__(self, num_pixels=0, color=None, rate=None, life=40, capacity=1000, seed=None):
+        super(TwinkleGenerator, self).__init__(num_pixels=num_pixels, capacity=capacity,
+                                               twinkle=True, seed=seed)
+        self.color = color
+        # The default keeps about a fifth of the pixels lit
+        self.rate = rate if rate is not None else num_pixels / (4.0 * life)
+        self.life = life
+
+    def emit(self, t):
+        count = self.random_count(self.rate)
+        if count:
+            self.particles.emit(count, self.random.integers(0, self.num_pixels, count).astype(numpy.float32),
+                                0.0, self.random_colors(count, self.color),
+                                self.random.uniform(self.life / 2, self.life, count))
+
+
+class RainGenerator(ParticleGenerator):
+    """
+    Drops fall from the end of the strip toward pixel 0 and speed up.
+    """
+    def __init__(self, num_pixels=0, color=(0, 64, 255), rate=0.3, speed=0.5, gravity=-0.02,
+                 trail=0.4, capacity=1000, seed=None):
+        super(RainGenerator, self).__init__(num_pixels=num_pixels, capacity=capacity,
+                                            trail=trail, gravity=gravity, seed=seed)
+        self.color = color
+        self.rate = rate
+        self.speed = speed
+
+    def emit(self, t):
+        count = self.random_count(self.rate)
+        if count:
+            # Drops live until they reach pixel 0
+            self.particles.emit(count, float(self.num_pixels - 1),
+                                -self.random.uniform(0.5 * self.speed, self.speed, count),
+                                self.random_colors(count, self.color),
+                                float(self.num_pixels * 10))
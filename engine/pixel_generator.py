@@ -20,6 +20,15 @@
 class PixelGenerator:
     """
     Template base class for a pixel generator.
+
+    A generator produces a sequence of frames. The engine calls start(),
+    then render() once per frame and finally stop(). A generator should
+    override render() and draw each frame with the frame buffer's bulk
+    operations. The default render() is built on step() and pixel(),
+    which costs a Python call per pixel per frame.
+
+    Generators are constructed with the number of pixels and the keyword
+    options given in the script (see the generator statement).
     """
     def __init__(self, num_pixels=0):
         self.num_pixels = num_pixels
@@ -38,6 +47,18 @@ class PixelGenerator:
         """
         return 0, 0, 0
 
+    def render(self, frame_buffer, t):
+        """
+        Draw a whole frame
+        :param frame_buffer: The frame buffer to draw in (see FrameBuffer)
+        :param t: Frame number. Frames are rendered in order starting
+        with 0 after start().
+        :return: None
+        """
+        if t > 0:
+            self.step()
+        frame_buffer.set_pixels([self.pixel(n) for n in range(self.num_pixels)])
+
     def stop(self):
         pass
 
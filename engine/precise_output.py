@@ -0,0 +1,95 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# 16 bit output stage
+#
+# Used by the output pipeline when dithering or power limiting is on.
+# The frame is looked up in the pipeline's 16 bit per channel tables, so
+# gamma, white balance and brightness keep the low bits of dim colors.
+#
+# Temporal dithering: when a 16 bit value falls between two 8 bit values,
+# each pixel carries its rounding error over to the next frame. Over a
+# few frames, the pixel shows the in between level. This smooths fades
+# at low brightness, provided frames are shown at a high rate.
+#
+# This module requires NumPy.
+#
+
+import numpy
+
+# 16 bit value of an 8 bit value of 1
+ONE = 257
+
+
+def pack(rgb, shifts):
+    """
+    Pack an (N, 3) array of 8 bit colors into the driver's color format
+    :param rgb: (N, 3) array of 8 bit colors
+    :param shifts: Bit positions of r, g and b (see FrameBuffer.channel_shifts)
+    :return: List of N color values
+    """
+    p = rgb.astype(numpy.uint32)
+    return ((p[:, 0] << shifts[0]) | (p[:, 1] << shifts[1]) | (p[:, 2] << shifts[2])).tolist()
+
+
+class PreciseOutput:
+    """
+    Converts frames to the driver's color format with 16 bits per channel
+    """
+    def __init__(self, num_pixels, dithering=False, limiter=None):
+        """
+        Constructor
+        :param num_pixels: Number of pixels in a frame
+        :param dithering: True to dither the 16 bit frame to 8 bits
+        :param limiter: A PowerLimiter or None
+        """
+        # Rounding error of each pixel channel carried to the next frame (16 bit units)
+        self._error = numpy.zeros((num_pixels, 3), dtype=numpy.int32) if dithering else None
+        self._limiter = limiter
+        self._tables = None
+        self._channels = numpy.arange(3)
+
+    def set_tables(self, tables):
+        """
+        Set the 16 bit lookup tables
+        :param tables: One list of 256 16 bit values per channel (r, g, b)
+        """
+        self._tables = numpy.array(tables, dtype=numpy.int32)
+
+    def process(self, rgb, shifts):
+        """
+        Process a frame
+        :param rgb: (N, 3) uint8 array of the frame
+        :param shifts: Bit positions of r, g and b in the driver's color format
+        :return: List of N color values in the driver's color format
+        """
+        # One lookup for all the pixels of all three channels
+        frame = self._tables[self._channels, rgb]
+        if self._limiter is not None:
+            factor = self._limiter.factor(int(frame.sum()))
+            if factor is not None:
+                # 16.16 fixed point scale (a 16 bit value times the scale needs 64 bits)
+                frame = (frame.astype(numpy.int64) * int(factor * 65536) >> 16).astype(numpy.int32)
+        return pack(self._quantize(frame), shifts)
+
+    def _quantize(self, frame):
+        """
+        Convert a 16 bit frame to 8 bits
+        :param frame: (N, 3) int32 array of 16 bit values
+        :return: (N, 3) array of 8 bit values
+        """
+        if self._error is None:
+            return (frame + ONE // 2) // ONE
+        target = frame + self._error
+        out = numpy.clip((target + ONE // 2) // ONE, 0, 255)
+        self._error = target - out * ONE
+        return out
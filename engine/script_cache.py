@@ -0,0 +1,166 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Compiled script cache
+#
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("led")
+
+
+class ScriptCache:
+    """
+    Holds compiled script VMs so that starting a script that has
+    already been compiled does not require a recompile. A compiled
+    VM is never modified during execution, so it can be run any
+    number of times.
+
+    An entry is keyed by the script file plus the set of script parameters
+    used to compile it. Switching between variants of the same script
+    (different parameters) is a cache hit.
+
+    Each entry records a fingerprint (mtime, size and content hash) of the
+    main script file and every file it imports (transitively). An entry is
+    only used if none of those files has changed. The mtime and size are
+    checked first. The content hash is only computed when the mtime or size
+    has changed (e.g. a file was touched but not modified).
+
+    The cache is bounded. When it is full, the least recently used
+    entry is evicted. The cache is thread safe (it is filled by the
+    background script validator).
+    """
+    DEFAULT_MAX_ENTRIES = 16
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self._max_entries = max(1, max_entries)
+        # key: (fingerprints, vm) in LRU order (most recent last)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(script_file, parameters=None):
+        """
+        Create a cache key for a script file and parameter set
+        :param script_file: Full path to the script file
+        :param parameters: Dict of script parameters (name: value)
+        :return: The cache key
+        """
+        if parameters:
+            return os.path.abspath(script_file), tuple(sorted(parameters.items()))
+        return os.path.abspath(script_file), ()
+
+    @staticmethod
+    def file_hash(path):
+        """
+        Compute the content hash of a file
+        :param path: File path
+        :return: Hex digest of the file content
+        """
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    @staticmethod
+    def fingerprint(path):
+        """
+        Create a fingerprint for a source file
+        :param path: Source file path
+        :return: List [path, mtime_ns, size, content-hash]
+        """
+        st = os.stat(path)
+        return [path, st.st_mtime_ns, st.st_size, ScriptCache.file_hash(path)]
+
+    @staticmethod
+    def source_fingerprints(vm):
+        """
+        Create fingerprints for all of the source files of a compiled VM
+        :param vm: A compiled VM
+        :return: List of fingerprints or None if a source file cannot be read
+        """
+        try:
+            return [ScriptCache.fingerprint(f) for f in vm.source_files]
+        except Exception as ex:
+            logger.debug("Unable to fingerprint script source files: %s", str(ex))
+        return None
+
+    @staticmethod
+    def is_fresh(fingerprints):
+        """
+        Determine if all of the source files described by a list of
+        fingerprints are unchanged. Fingerprints of files that were touched
+        but not modified are updated in place.
+        :param fingerprints: List of fingerprints created by fingerprint()
+        :return: True if none of the source files has changed
+        """
+        for fp in fingerprints:
+            try:
+                st = os.stat(fp[0])
+                if st.st_mtime_ns == fp[1] and st.st_size == fp[2]:
+                    continue
+                if st.st_size != fp[2] or ScriptCache.file_hash(fp[0]) != fp[3]:
+                    logger.debug("Source file %s has changed", fp[0])
+                    return False
+                # Touched but not modified
+                fp[1] = st.st_mtime_ns
+            except Exception as ex:
+                logger.debug("Unable to check source file %s: %s", fp[0], str(ex))
+                return False
+        return True
+
+    def get(self, key):
+        """
+        Look up a compiled VM
+        :param key: A key created by the key() method
+        :return: The cached VM or None if there is no entry or
+        the entry is stale
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not ScriptCache.is_fresh(entry[0]):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, vm, fingerprints=None):
+        """
+        Add a compiled VM to the cache
+        :param key: A key created by the key() method
+        :param vm: The compiled VM. Its source_files list names the
+        main script file and all imported files.
+        :param fingerprints: Source file fingerprints. If None, they are
+        created from the VM's source files.
+        :return: None
+        """
+        if fingerprints is None:
+            fingerprints = ScriptCache.source_fingerprints(vm)
+            if fingerprints is None:
+                return
+        with self._lock:
+            self._entries[key] = (fingerprints, vm)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                evicted = self._entries.popitem(last=False)
+                logger.debug("Evicted compiled script %s from cache", evicted[0][0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
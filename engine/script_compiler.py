@@ -15,9 +15,15 @@
 
 import datetime
 import logging
+import os
 import re
+import wave
 from . import webcolor_definitions
-import webcolors
+from .import_graph import ImportGraph
+from .palette import build_palette
+from .color_fade import EASINGS
+from . import generator_registry
+from .image_file import read_ppm_header, RAW_EXTENSION
 
 logger = logging.getLogger("led")
 
@@ -27,9 +33,54 @@ class ScriptCompiler:
     """
     _scrollpixels_default = 5
 
-    def __init__(self, vm):
+    # Parses an eval statement into 3 groups: eval, name, eval-expression
+    _eval_regex = re.compile(r"^\s*(\S+)\s+(\S+)\s+(\S.*$)")
+
+    # Algorithm statements that can be run immediately (without a script file)
+    _immediate_stmts = (
+        "rainbow",
+        "rainbowcycle",
+        "colorwipe",
+        "theaterchase",
+        "runwaychase",
+        "theaterchase2",
+        "theaterchaserainbow",
+        "scrollpixels",
+        "randompixels",
+        "sinewave",
+        "solidcolor",
+        "colorfade",
+        "twocolor",
+        "color77",
+        "generator",
+        "rowsweep",
+        "columnsweep",
+        "radialrainbow",
+        "scrollimage",
+        "stepimage",
+        "audio",
+        "fireworks",
+        "comet",
+        "twinkle",
+        "rain",
+    )
+
+    def __init__(self, vm, search_path=None):
+        """
+        Constructor
+        :param vm: The VM instance to be compiled into
+        :param search_path: Directory searched for imported files (usually
+        the ScriptFileDirectory) when they are not found relative to the
+        importing file.
+        """
         self._last_error = None
         self._vm = vm
+        # Tracks imported files during a compile
+        self._imports = ImportGraph(search_path=search_path)
+        # Script parameters are applied by the compile phase only
+        self._parameters = {}
+        # Names of the parameters that matched a define or color
+        self._used_parameters = set()
         self._stmt = None
         self._file_depth = 0
         self._line_number = [0]
@@ -49,6 +100,7 @@ class ScriptCompiler:
             "define": self.define_stmt,
             "eval": self.eval_stmt,
             "import": self.import_stmt,
+            "import-once": self.import_stmt,
             "logmessage": self.logmessage_stmt,
             "do-for-n": self.do_for_n_stmt,
             "do-for-n-end": self.do_for_n_end_stmt,
@@ -78,16 +130,26 @@ class ScriptCompiler:
             "colorfade": self.colorfade_stmt,
             "twocolor": self.twocolor_stmt,
             "color77": self.color77_stmt,
+            "generator": self.generator_stmt,
+            "rowsweep": self.sweep_stmt,
+            "columnsweep": self.sweep_stmt,
+            "radialrainbow": self.radialrainbow_stmt,
+            "scrollimage": self.image_stmt,
+            "stepimage": self.image_stmt,
+            "audio": self.audio_stmt,
+            "fireworks": self.particles_stmt,
+            "comet": self.particles_stmt,
+            "twinkle": self.particles_stmt,
+            "rain": self.particles_stmt,
+            "palette": self.palette_stmt,
+            "palettecycle": self.palette_algorithm_stmt,
+            "palettescroll": self.palette_algorithm_stmt,
             "select-one": self.select_one,
             "select-one-end": self.select_one_end,
         }
 
-        # Add all of the web colors as defined colors
-        # This makes them accessible by all commands
-        for wcname in webcolor_definitions.CSS3_NAMES_TO_HEX:
-            wc = webcolor_definitions.CSS3_NAMES_TO_HEX[wcname][1:]
-            self.color_stmt(["color", wcname, wc])
-        logger.debug("%d web colors", len(self._vm.colors))
+        # Parameters override define and color statements in the script
+        self._parameters = self._vm.parameters
 
     @property
     def last_error(self):
@@ -103,52 +165,145 @@ class ScriptCompiler:
         :param script_file:
         :return:
         """
-        self._last_error = None
-        self._vm.script_file = script_file
-
-        # Open the script file for compiling
-        try:
-            sf = open(script_file, "r")
-            self._file_path[self._file_depth] = script_file
-        except Exception as ex:
-            self.script_error("Error opening script file {0}".format(script_file))
-            logger.error("Error opening script file %s", script_file)
-            logger.error(str(ex))
-            return False
+        source_path = os.path.abspath(script_file)
+        self._file_path[self._file_depth] = script_file
 
-        valid = True
-        stmt = sf.readline()
-        while stmt and valid:
-            self._stmt = stmt
-            self._line_number[self._file_depth] += 1
-
-            # Remove line end comment
-            comment_start = stmt.find("#")
-            if comment_start >= 0:
-                stmt = stmt[ : comment_start]
-            # case insensitive tokenization
-            tokens = stmt.lower().split()
+        # Imported files are compiled recursively. Only the main file is the script file.
+        if self._file_depth == 0:
+            self._last_error = None
+            self._vm.script_file = script_file
 
-            # Catch unhandled exceptions
+        # An imported file is only read and parsed once per compile
+        parsed = self._imports.parsed(source_path)
+        if parsed is None:
+            # Open the script file for compiling
             try:
-                valid = self.compile_statement(stmt, tokens)
+                sf = open(script_file, "r")
+                if self._file_depth == 0:
+                    self._imports.enter(source_path)
+                # Record every source file for cache invalidation
+                if source_path not in self._vm.source_files:
+                    self._vm.source_files.append(source_path)
             except Exception as ex:
-                self.script_error(str(ex))
+                self.script_error("Error opening script file {0}".format(script_file))
+                logger.error("Error opening script file %s", script_file)
+                logger.error(str(ex))
                 return False
+        else:
+            sf = None
 
-            stmt = sf.readline()
+        valid = True
+        try:
+            valid = self._compile_statements(sf, source_path, parsed)
+        finally:
+            if sf:
+                sf.close()
 
         # TODO Validate that all script blocks are closed
         if self._do_for >= 0:
             logger.debug("%d do-for statement(s) open at script end", self._do_for + 1)
 
-        sf.close()
-
         # End of main file
         if self._file_depth == 0:
+            self._imports.leave()
+            # A parameter that matched nothing is most likely a misspelled name
+            unused = sorted(set(self._parameters) - self._used_parameters)
+            if unused:
+                self._stmt = None
+                self.script_error("Unknown script parameter(s) {0}: no define or color has that name".format(
+                    ", ".join(unused)))
+                valid = False
             logger.debug("%d statements compiled", len(self._vm.stmts))
         return valid
 
+    def _compile_statements(self, sf, source_path, parsed):
+        """
+        Compile the statements of a file. The file is streamed in a
+        single pass, so the size of the script file does not matter.
+        The statements of an imported file are saved so a repeated import
+        does not read and tokenize the file again.
+        :param sf: Open script file or None if the file was parsed before
+        :param source_path: Full path of the script file
+        :param parsed: List of previously parsed statements (line-number, stmt, tokens)
+        or None if the file has not been parsed
+        :return: True if all statements are valid
+        """
+        line_number = self._line_number
+        file_depth = self._file_depth
+        compile_statement = self.compile_statement
+
+        if parsed is None:
+            # The main file is not saved. It can't be imported (that would be a cycle).
+            save = [] if file_depth > 0 else None
+            statements = self._parse_file(sf, save)
+        else:
+            # Statement compilers modify the tokens list, so each use gets a copy
+            save = None
+            statements = ((n, stmt, list(tokens)) for n, stmt, tokens in parsed)
+
+        for n, stmt, tokens in statements:
+            self._stmt = stmt
+            line_number[file_depth] = n
+
+            # Catch unhandled exceptions
+            try:
+                if not compile_statement(stmt, tokens):
+                    return False
+            except Exception as ex:
+                self.script_error(str(ex))
+                return False
+
+        if save is not None:
+            self._imports.set_parsed(source_path, save)
+        return True
+
+    @staticmethod
+    def _parse_file(sf, save=None):
+        """
+        Generates the statements of a script file. Comments and
+        blank lines are skipped.
+        :param sf: Open script file
+        :param save: If not None, a list where a copy of each parsed statement is appended
+        :return: Generator of (line-number, stmt, tokens)
+        """
+        n = 0
+        for stmt in sf:
+            n += 1
+            # Remove line end comment and do case insensitive tokenization
+            tokens = stmt.partition("#")[0].lower().split()
+            if not tokens:
+                continue
+            if save is not None:
+                save.append((n, stmt, tuple(tokens)))
+            yield n, stmt, tokens
+
+    def compile_immediate(self, stmt):
+        """
+        Compile a single algorithm statement without a script file.
+        The statement is compiled into a do-forever block so it runs
+        until the script engine is stopped.
+        :param stmt: The statement text (e.g. solidcolor orange 1000)
+        :return: True if the statement is valid.
+        """
+        self._last_error = None
+        self._file_path[self._file_depth] = "<run>"
+        self._line_number[self._file_depth] = 1
+        self._stmt = stmt
+
+        tokens = stmt.lower().split()
+        if len(tokens) == 0 or tokens[0] not in self._immediate_stmts:
+            self.script_error("Statement cannot be run immediately")
+            return False
+
+        # Catch unhandled exceptions
+        try:
+            return self.compile_statement("do-forever", ["do-forever"]) and \
+                self.compile_statement(stmt, tokens) and \
+                self.compile_statement("do-forever-end", ["do-forever-end"])
+        except Exception as ex:
+            self.script_error(str(ex))
+        return False
+
     def compile_statement(self, stmt, tokens):
         """
         Compile a single tokenized statement.
@@ -163,12 +318,19 @@ class ScriptCompiler:
         # A statement is valid by default
         valid = True
 
+        # Substitute script parameters for define/color values
+        if self._parameters:
+            tokens = self.apply_parameters(tokens)
+            if tokens is None:
+                return False
+
         # Compile the statement. Here we build a list of valid script statements.
         if tokens[0] in self._valid_stmts:
+            stmt_compiler = self._valid_stmts[tokens[0]]
             # Run the statement compiler if there is one
-            if self._valid_stmts[tokens[0]]:
+            if stmt_compiler:
                 # Here's where the statement is actually compiled
-                compiled_tokens = self._valid_stmts[tokens[0]](tokens)
+                compiled_tokens = stmt_compiler(tokens)
                 # If the statement is valid and executable, add it to the statement list
                 if compiled_tokens and len(compiled_tokens):
                     self._vm.stmts.append(compiled_tokens)
@@ -180,14 +342,64 @@ class ScriptCompiler:
 
         return valid
 
+    def apply_parameters(self, tokens):
+        """
+        Apply script parameters to a define or color statement. A parameter
+        replaces the value of the define or color with the same name.
+            define name parameter-value
+            color name parameter-value
+        A color parameter value can be a web color, a hex color (rrggbb or 0xrrggbb)
+        or an r,g,b triple (no spaces).
+        :param tokens: Statement tokens
+        :return: Statement tokens with parameter substitution applied or
+        None if the parameter value is not valid
+        """
+        if len(tokens) < 2 or tokens[1] not in self._parameters:
+            return tokens
+        if tokens[0] not in ("define", "color"):
+            return tokens
+        value = str(self._parameters[tokens[1]]).strip()
+        self._used_parameters.add(tokens[1])
+        if tokens[0] == "define":
+            logger.debug("Parameter %s overrides define value", tokens[1])
+            return [tokens[0], tokens[1], value]
+        logger.debug("Parameter %s overrides color value", tokens[1])
+        color_values = self._parameter_color(value)
+        if color_values is None:
+            self.script_error("Parameter {0} value {1} must be a web color, a hex color (rrggbb) "
+                              "or r,g,b values 0-255".format(tokens[1], value))
+            return None
+        return [tokens[0], tokens[1]] + color_values
+
+    def _parameter_color(self, value):
+        """
+        Validate a color parameter value
+        :param value: A web color, a hex color ([0x]rrggbb) or an r,g,b triple
+        :return: The color statement value tokens or None if the value is not a color
+        """
+        if ScriptCompiler._translate_web_color(value):
+            return [value]
+        if "," in value:
+            rgb = [v.strip() for v in value.split(",")]
+            if len(rgb) == 3 and self.are_valid_colors(rgb):
+                return rgb
+            return None
+        digits = value[2:] if value.lower().startswith("0x") else value
+        if len(digits) == 6 and all(c in "0123456789abcdefABCDEF" for c in digits):
+            return [value]
+        return None
+
     @staticmethod
     def _translate_web_color(token):
-        try:
-            rgb = webcolors.name_to_rgb(token)
-            return list(rgb)
-        except Exception:
-            pass
-        return None
+        """
+        Look up a web color
+        :param token: A web color name
+        :return: [r, g, b] or None if the token is not a web color
+        """
+        rgb = webcolor_definitions.CSS3_NAMES_TO_RGB.get(token)
+        if rgb is None:
+            return None
+        return list(rgb)
 
     def add_color(self, name, color_values):
         """
@@ -285,14 +497,11 @@ class ScriptCompiler:
             if type(c) is tuple and len(c) == 3:
                 return 1, list(c)
 
-        # Then, look for a defined color (which includes web colors)
-        if tokens[index] in self._vm.colors:
-            return 1, self._vm.colors[tokens[index]]
-
-        # Finally, look for a web color
-        rgb_list = ScriptCompiler._translate_web_color(tokens[index])
-        if rgb_list:
-            return (1, rgb_list)
+        # Then, look for a defined color. The VM color table is layered
+        # over the web color table, so this also finds web colors.
+        rgb = self._vm.colors.get(tokens[index])
+        if rgb is not None:
+            return 1, rgb
 
         # Then, assume r, g, b color values. Each value can be a defined value or literal value.
         r = self.validate_color_value(tokens[index])
@@ -428,14 +637,12 @@ class ScriptCompiler:
             self.script_error("Not enough tokens")
             return None
 
-        # Use regex to parse statement
-        regex = r"^\s*(\S+)\s+(\S+)\s+(\S.*$)"
-        rp = re.compile(regex)
+        # Use the precompiled regex to parse statement
         # The match should produce 3 groups where
         # 1 = eval
         # 2 = name
         # 3 = eval-expression
-        rm = rp.match(self._stmt)
+        rm = ScriptCompiler._eval_regex.match(self._stmt)
         if not rm:
             self.script_error("Invalid eval statement: " + self._stmt)
             return None
@@ -468,6 +675,11 @@ class ScriptCompiler:
     def import_stmt(self, tokens):
         """
         Import a source file directly in-line
+            import filepath
+            import-once filepath
+        A relative filepath is resolved relative to the importing file, then the
+        script file directory. import-once skips a file that has already been
+        compiled. A circular import is a compile error.
         :param tokens: filepath
         :return:
         """
@@ -475,19 +687,43 @@ class ScriptCompiler:
             self.script_error("Missing file path")
             return None
 
+        # File names are case sensitive, so use the file name as written
+        name = self._stmt.split()[1]
+        importing_file = self._imports.current_file
+        path = self._imports.resolve(name, importing_file)
+        if path is None and name != tokens[1]:
+            path = self._imports.resolve(tokens[1], importing_file)
+        if path is None:
+            self.script_error("Import file not found: {0}".format(name))
+            return None
+
+        if tokens[0] == "import-once" and self._imports.is_included(path):
+            logger.debug("%s has already been imported", path)
+            return tokens
+
+        cycle = self._imports.enter(path)
+        if cycle:
+            self.script_error("Circular import: {0}".format(" -> ".join(cycle)))
+            return None
+
         # Push the imported file onto the file stack
         self._file_depth += 1
-        self._file_path.append(tokens[1])
+        self._file_path.append(path)
         self._line_number.append(0)
 
-        # This is a recursive call to compile the imported file
-        # TODO Do we need a recursion limit here?
-        self.compile(tokens[1])
+        # This is a recursive call to compile the imported file.
+        # Cycles are rejected above, so the recursion is bounded.
+        valid = self.compile(path)
 
         # Pop the file stack
         self._file_depth -= 1
         self._line_number.pop()
         self._file_path.pop()
+        self._imports.leave()
+
+        if not valid:
+            # The error was reported by the imported file
+            return None
 
         # The cpu will ignore this statement
         return tokens
@@ -786,7 +1022,7 @@ class ScriptCompiler:
 
     def colorfade_stmt(self, tokens):
         """
-        colorfade r g b r g b [wait=1000.0] [iterations=1000]
+        colorfade r g b r g b [wait=1000.0] [iterations=1000] [easing=linear] [gamma]
         The wait value is how long the color is displayed.
         :param tokens:
         :return:
@@ -795,6 +1031,16 @@ class ScriptCompiler:
             self.script_error("Not enough tokens")
             return None
 
+        # The easing curve and gamma options are recognized by name
+        easing = "linear"
+        gamma = False
+        while tokens[-1] in EASINGS or tokens[-1] == "gamma":
+            if tokens[-1] == "gamma":
+                gamma = True
+            else:
+                easing = tokens[-1]
+            tokens = tokens[:-1]
+
         trans_tokens = [tokens[0]]
         token_index = 1 # Initially the first arg after the command
 
@@ -824,6 +1070,8 @@ class ScriptCompiler:
         trans_tokens.append(r[1])
         token_index += r[0]
 
+        trans_tokens.extend([easing, gamma])
+
         return trans_tokens
 
     def rainbow_stmt(self, tokens):
@@ -838,6 +1086,112 @@ class ScriptCompiler:
         trans_tokens = self.resolve_algorithm_args(tokens, color=False, wait=20.0, iterations=1)
         return trans_tokens
 
+    def radialrainbow_stmt(self, tokens):
+        """
+        radialrainbow [wait=20.0 iterations=1]
+        :param tokens:
+        :return:
+        """
+        if len(tokens) < 1:
+            self.script_error("Not enough tokens")
+            return None
+        trans_tokens = self.resolve_algorithm_args(tokens, color=False, wait=20.0, iterations=1)
+        return trans_tokens
+
+    def image_stmt(self, tokens):
+        """
+        scrollimage filepath [wait=50.0] [iterations=1]
+        stepimage filepath [wait=50.0] [iterations=1]
+        A relative filepath is resolved like an import file path.
+        :param tokens:
+        :return:
+        """
+        if len(tokens) < 2:
+            self.script_error("Missing image file path")
+            return None
+
+        # File names are case sensitive, so use the file name as written
+        name = self._stmt.split()[1]
+        path = self._imports.resolve(name, self._imports.current_file)
+        if path is None:
+            self.script_error("Image file not found: {0}".format(name))
+            return None
+        # The size of a raw image depends on the grid, so only a PPM header is checked
+        if not path.lower().endswith(RAW_EXTENSION):
+            try:
+                with open(path, "rb") as f:
+                    read_ppm_header(f)
+            except Exception as ex:
+                self.script_error("Invalid image file {0}: {1}".format(name, str(ex)))
+                return None
+        trans_tokens = [tokens[0], path]
+        token_index = 2
+
+        # Resolve wait
+        r = self.resolve_wait_arg(tokens, token_index, default=50.0)
+        trans_tokens.append(r[1])
+        token_index += r[0]
+
+        # Resolve iterations
+        r = self.resolve_iterations_arg(tokens, token_index, default=1)
+        trans_tokens.append(r[1])
+
+        return trans_tokens
+
+    def audio_stmt(self, tokens):
+        """
+        audio filepath [bands=8] [wait=20.0]
+        The filepath is a WAV file (resolved like an import file path) or a named pipe.
+        :param tokens:
+        :return:
+        """
+        if len(tokens) < 2:
+            self.script_error("Missing audio file path")
+            return None
+
+        # File names are case sensitive, so use the file name as written
+        name = self._stmt.split()[1]
+        path = self._imports.resolve(name, self._imports.current_file)
+        if path is None:
+            # A named pipe is not a regular file
+            if not os.path.exists(name):
+                self.script_error("Audio file not found: {0}".format(name))
+                return None
+            path = os.path.abspath(name)
+        else:
+            try:
+                with wave.open(path, "rb") as w:
+                    w.getnframes()
+            except Exception as ex:
+                self.script_error("Invalid WAV file {0}: {1}".format(name, str(ex)))
+                return None
+        trans_tokens = [tokens[0], path]
+        token_index = 2
+
+        # Resolve bands
+        r = self.resolve_iterations_arg(tokens, token_index, default=8)
+        trans_tokens.append(r[1])
+        token_index += r[0]
+
+        # Resolve wait
+        r = self.resolve_wait_arg(tokens, token_index, default=20.0)
+        trans_tokens.append(r[1])
+
+        return trans_tokens
+
+    def sweep_stmt(self, tokens):
+        """
+        rowsweep r g b [wait=50.0 iterations=1]
+        columnsweep r g b [wait=50.0 iterations=1]
+        :param tokens:
+        :return:
+        """
+        if len(tokens) < 2:
+            self.script_error("Not enough tokens")
+            return None
+        trans_tokens = self.resolve_algorithm_args(tokens, wait=50.0, iterations=1)
+        return trans_tokens
+
     def rainbowcycle_stmt(self, tokens):
         """
         rainbow [wait=20.0 iterations=5]
@@ -1038,6 +1392,72 @@ class ScriptCompiler:
 
         return trans_tokens
 
+    def palette_stmt(self, tokens):
+        """
+        palette name color [color...]
+        Each color is a defined color, a web color or an eval. An eval can be
+        a color (r, g, b) or a list of colors. The colors are the stops of a
+        gradient which is compiled into a 256 entry lookup table.
+        :param tokens:
+        :return:
+        """
+        if len(tokens) < 3:
+            self.script_error("Not enough tokens")
+            return None
+
+        stops = []
+        for t in tokens[2:]:
+            c = self.resolve_eval(t)
+            if isinstance(c, (list, tuple)):
+                if len(c) == 3 and all(isinstance(v, int) for v in c):
+                    stops.append(c)
+                    continue
+                if c and all(isinstance(e, (list, tuple)) and len(e) == 3 for e in c):
+                    stops.extend(c)
+                    continue
+            rgb = self._vm.colors.get(t)
+            if rgb is not None:
+                stops.append(rgb)
+                continue
+            self.script_error("Invalid/undefined palette color: {0}".format(t))
+            return None
+
+        if not stops or not self.are_valid_colors([v for c in stops for v in c]):
+            self.script_error("Palette colors must be 0-255")
+            return None
+
+        self._vm.palettes[tokens[1]] = build_palette(stops)
+        return []
+
+    def palette_algorithm_stmt(self, tokens):
+        """
+        palettecycle palette [wait=20.0] [iterations=1]
+        palettescroll palette [wait=20.0] [iterations=1]
+        :param tokens:
+        :return:
+        """
+        if len(tokens) < 2:
+            self.script_error("Not enough tokens")
+            return None
+
+        # The palette lookup table is passed to the CPU
+        if tokens[1] not in self._vm.palettes:
+            self.script_error("Undefined palette: " + tokens[1])
+            return None
+        trans_tokens = [tokens[0], self._vm.palettes[tokens[1]]]
+        token_index = 2
+
+        # Resolve wait
+        r = self.resolve_wait_arg(tokens, token_index, default=20.0)
+        trans_tokens.append(r[1])
+        token_index += r[0]
+
+        # Resolve iterations
+        r = self.resolve_iterations_arg(tokens, token_index, default=1)
+        trans_tokens.append(r[1])
+
+        return trans_tokens
+
     def color77_stmt(self, tokens):
         """
         color77 [color-list=color77-default [wait=200.0] [iterations=100]]
@@ -1054,8 +1474,9 @@ class ScriptCompiler:
             # The first arg MUST be a color-list
             cl = self.resolve_eval(tokens[1])
             if cl:
-                if len(cl) != 7:
-                    self.script_error("Color-list eval must contain 7 colors: " + tokens[1])
+                if not isinstance(cl, (list, tuple)) or \
+                        not all(isinstance(c, (list, tuple)) and len(c) == 3 for c in cl):
+                    self.script_error("Color-list eval must be a list of colors: " + tokens[1])
                     return None
                 trans_tokens.append(cl)
             else:
@@ -1074,3 +1495,63 @@ class ScriptCompiler:
         token_index += r[0]
 
         return trans_tokens
+
+    def generator_stmt(self, tokens):
+        """
+        generator name [options-eval] [wait=50.0] [iterations=100]
+        The options eval is a dict of keyword options for the generator.
+        :param tokens:
+        :return:
+        """
+        if len(tokens) < 2:
+            self.script_error("Not enough tokens")
+            return None
+
+        # The generator is not loaded until the statement runs
+        if not generator_registry.is_generator(tokens[1]):
+            self.script_error("Unknown generator: " + tokens[1])
+            return None
+        return self.resolve_generator_args(tokens[1], tokens, 2, wait=50.0, iterations=100)
+
+    def particles_stmt(self, tokens):
+        """
+        fireworks [options-eval] [wait=20.0] [iterations=500]
+        comet [options-eval] [wait=20.0] [iterations=500]
+        twinkle [options-eval] [wait=20.0] [iterations=500]
+        rain [options-eval] [wait=20.0] [iterations=500]
+        The particle effects are generators (see engine/particles.py).
+        :param tokens:
+        :return:
+        """
+        return self.resolve_generator_args(tokens[0], tokens, 1, wait=20.0, iterations=500)
+
+    def resolve_generator_args(self, name, tokens, token_index, wait=None, iterations=None):
+        """
+        Resolve the arguments of a generator
+        [options-eval] [wait] [iterations]
+        :param name: Generator name
+        :param tokens: Command tokens
+        :param token_index: Index of the first argument
+        :param wait: Default wait time
+        :param iterations: Default iterations
+        :return: Translated generator statement
+        """
+        trans_tokens = ["generator", name]
+
+        # Options are optional
+        options = {}
+        if len(tokens) > token_index and isinstance(self.resolve_eval(tokens[token_index]), dict):
+            options = self.resolve_eval(tokens[token_index])
+            token_index += 1
+        trans_tokens.append(dict(options))
+
+        # Resolve wait
+        r = self.resolve_wait_arg(tokens, token_index, default=wait)
+        trans_tokens.append(r[1])
+        token_index += r[0]
+
+        # Resolve iterations
+        r = self.resolve_iterations_arg(tokens, token_index, default=iterations)
+        trans_tokens.append(r[1])
+
+        return trans_tokens
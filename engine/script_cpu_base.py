@@ -32,6 +32,8 @@ class ScriptCPUBase:
         self._leddev = leddev
         self._vm = vm
         self._terminate_event = terminate_event
+        # When False, the LEDs are left as they are when the CPU stops (VM swap)
+        self.reset_at_end = True
         # This is the equivalent of the next instruction address
         self._stmt_index = 0
         # Do-For-N control
@@ -60,6 +62,7 @@ class ScriptCPUBase:
             "color": None,
             "value": None,
             "import": None,
+            "import-once": None,
             "logmessage": self.logmessage_stmt,
             "do-for-n": self.do_for_n_stmt,
             "do-for-n-end": self.do_for_n_end_stmt,
@@ -120,7 +123,8 @@ class ScriptCPUBase:
                 logger.error("%d unterminated do-for statements", self._do_for_active + 1)
 
         logger.info("Virtual CPU stopped")
-        self._reset()
+        if self.reset_at_end:
+            self._reset()
         return next_index > 0
 
     def _execute_stmt(self, stmt):
@@ -21,26 +21,59 @@
 #
 
 from . import script_cpu_base
-from colorcyclers.sine_color_cycler import SineColorCycler
-from .color77_generator import Color77PixelGenerator
+from .frame_buffer import create_frame_buffer
+from .frame_cache import get_frame_cache
+from .color_cycler import sine_color_list
+from .color_fade import build_fade
+from .generator_registry import get_generator
+from .image_file import ImageFile
 import time
+import math
 import random
 from collections import deque
 import logging
+import configuration
 
 logger = logging.getLogger("led")
 
+BLACK = (0, 0, 0)
+
+
 class ScriptCPULED(script_cpu_base.ScriptCPUBase):
-    def __init__(self, leddev, vm, terminate_event):
+    # Wheel color tables by frame buffer type. Each is computed once.
+    _wheel_tables = {}
+
+    def __init__(self, leddev, vm, terminate_event, frame_buffer=None):
         """
         Constructor
         :param leddev: A LED device driver instance (e.g. ws2811 or dotstar)
         :param vm: A script VM instance
         :param terminate_event: A threading event to be tested for termination
+        :param frame_buffer: The frame buffer the algorithms draw on. If None,
+        a frame buffer is created for the driver.
         :return: None
         """
         script_cpu_base.ScriptCPUBase.__init__(self, leddev, vm, terminate_event)
 
+        # The algorithms draw frames here
+        self._frame = frame_buffer if frame_buffer is not None else create_frame_buffer(leddev)
+        # Rainbow colors across 0-255 positions
+        frame_type = type(self._frame)
+        if frame_type not in ScriptCPULED._wheel_tables:
+            ScriptCPULED._wheel_tables[frame_type] = \
+                self._frame.table([ScriptCPULED.wheel_rgb(pos) for pos in range(256)])
+        self._wheel_table = ScriptCPULED._wheel_tables[frame_type]
+        # Rendered frames of the periodic algorithms
+        self._frame_cache = get_frame_cache()
+        # When the output pipeline applies gamma, the colorfade gamma option is ignored
+        self._pipeline_gamma = configuration.Configuration.Gamma() != 1.0
+        # Interpolated output (see _show()). Output frames per second, 0 is off.
+        self._interpolation_rate = configuration.Configuration.InterpolationRate()
+        self._no_interpolation = configuration.Configuration.InterpolationOptOut()
+        self._interpolating = False
+        # The last keyframe shown
+        self._keyframe = None
+
         # Valid algorithm statements and their handlers
         valid_stmts = {
             "rainbow": self.rainbow,
@@ -58,50 +91,150 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
             "colorfade": self.colorfade_stmt,
             "twocolor": self.twocolor_stmt,
             "color77": self.color77_stmt,
+            "generator": self.generator_stmt,
+            "palettecycle": self.palette_cycle,
+            "palettescroll": self.palette_scroll,
+            "rowsweep": self.row_sweep,
+            "columnsweep": self.column_sweep,
+            "radialrainbow": self.radial_rainbow,
+            "scrollimage": self.scroll_image,
+            "stepimage": self.step_image,
+            "audio": self.audio,
         }
 
         # Add the algorithms to the valid statement dict
         self._valid_stmts.update(valid_stmts)
 
+    def _execute_stmt(self, stmt):
+        # Interpolation is on or off for each statement (effect)
+        self._interpolating = self._interpolation_rate > 0 and stmt[0] not in self._no_interpolation and \
+            not (stmt[0] == "generator" and stmt[1] in self._no_interpolation)
+        return script_cpu_base.ScriptCPUBase._execute_stmt(self, stmt)
+
+    def _show(self, wait):
+        """
+        Show the frame and wait for the next one. When interpolation is on,
+        the frame is a keyframe: during the wait the strip moves from the
+        previous keyframe to this one in blended steps at the interpolation
+        rate. The frame is shown one wait later than without interpolation.
+        :param wait: Time until the next frame in seconds
+        :return: None
+        """
+        steps = int(wait * self._interpolation_rate) if self._interpolating else 0
+        if steps < 2 or self._keyframe is None:
+            self._frame.show()
+            if self._interpolation_rate > 0:
+                self._keyframe = self._frame.snapshot()[0]
+            if wait > 0 and not self._terminate_event.isSet():
+                time.sleep(wait)
+            return
+
+        keyframe = self._frame.snapshot()[0]
+        interval = wait / steps
+        next_time = time.perf_counter()
+        for step in range(1, steps + 1):
+            if step < steps:
+                self._frame.blend(self._keyframe, keyframe, step / float(steps))
+            else:
+                self._frame.restore(keyframe)
+            self._frame.show()
+            if self._terminate_event.isSet():
+                break
+            next_time += interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        # The algorithm carries on from its own frame
+        self._frame.restore(keyframe)
+        self._keyframe = keyframe
+
+    def _reset(self):
+        """
+        Reset all LEDs (and the frame buffer) to off
+        :return:
+        """
+        self._frame.clear()
+        self._keyframe = None
+        script_cpu_base.ScriptCPUBase._reset(self)
+
+    def _clear(self):
+        """
+        Turn off all LEDs
+        :return:
+        """
+        self._frame.clear()
+        self._keyframe = None
+        self._leddev.clear()
+
+    def _draw_cached(self, algorithm, step, draw):
+        """
+        Draw a frame of a periodic algorithm. If the frame has been drawn
+        before, it is copied from the frame cache. Otherwise, it is drawn
+        and added to the cache.
+        :param algorithm: Algorithm name
+        :param step: The algorithm's step (the frame within its period)
+        :param draw: Function that draws the frame
+        :return: None
+        """
+        key = (algorithm, self._frame.num_pixels, step, type(self._frame).__name__)
+        frame = self._frame_cache.get(key)
+        if frame is not None:
+            self._frame.restore(frame)
+        else:
+            draw()
+            self._frame_cache.put(key, *self._frame.snapshot())
+
     #
     # Start of algorithms derived from Adafruit code
     #
 
-    def wheel(self, pos):
-        """Generate rainbow colors across 0-255 positions."""
+    @staticmethod
+    def wheel_rgb(pos):
+        """Generate rainbow colors across 0-255 positions as (r, g, b)."""
         if pos < 85:
-            return self._leddev.color(pos * 3, 255 - pos * 3, 0)
+            return pos * 3, 255 - pos * 3, 0
         elif pos < 170:
             pos -= 85
-            return self._leddev.color(255 - pos * 3, 0, pos * 3)
+            return 255 - pos * 3, 0, pos * 3
         else:
             pos -= 170
-            return self._leddev.color(0, pos * 3, 255 - pos * 3)
+            return 0, pos * 3, 255 - pos * 3
+
+    def wheel(self, pos):
+        """Generate rainbow colors across 0-255 positions."""
+        return self._leddev.color(*ScriptCPULED.wheel_rgb(pos))
 
     def rainbow(self, stmt):
         """Draw rainbow that fades across all pixels at once."""
         wait_ms = float(stmt[1])
         iterations = int(stmt[2])
+        positions = self._frame.indexes([i & 255 for i in range(self._frame.num_pixels)])
+
+        def draw():
+            self._frame.gather(self._wheel_table, positions, offset=j & 255)
+
         for j in range(256 * iterations):
             if self._terminate_event.isSet():
                 break
-            for i in range(self._leddev.numPixels()):
-                self._leddev.setPixelColor(i, self.wheel((i + j) & 255))
-            self._leddev.show()
-            time.sleep(wait_ms / 1000.0)
+            self._draw_cached("rainbow", j & 255, draw)
+            self._show(wait_ms / 1000.0)
         return self._stmt_index + 1
 
     def rainbowCycle(self, stmt):
         """Draw rainbow that uniformly distributes itself across all pixels."""
         wait_ms = float(stmt[1])
         iterations = int(stmt[2])
+        num_pixels = self._frame.num_pixels
+        positions = self._frame.indexes([int(i * 256 / num_pixels) & 255 for i in range(num_pixels)])
+
+        def draw():
+            self._frame.gather(self._wheel_table, positions, offset=j & 255)
+
         for j in range(256 * iterations):
             if self._terminate_event.isSet():
                 break
-            for i in range(self._leddev.numPixels()):
-                self._leddev.setPixelColor(i, self.wheel(int((i * 256 / self._leddev.numPixels()) + j) & 255))
-            self._leddev.show()
-            time.sleep(wait_ms / 1000.0)
+            self._draw_cached("rainbowcycle", j & 255, draw)
+            self._show(wait_ms / 1000.0)
         return self._stmt_index + 1
 
     def colorwipe_stmt(self, stmt):
@@ -114,13 +247,12 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         if len(stmt) >= 5:
             wait_ms = stmt[4]
 
-        color = self._leddev.color(stmt[1], stmt[2], stmt[3])
-        for i in range(self._leddev.numPixels()):
+        color = stmt[1:4]
+        for i in range(self._frame.num_pixels):
             if self._terminate_event.isSet():
                 break
-            self._leddev.setPixelColor(i, color)
-            self._leddev.show()
-            time.sleep(wait_ms / 1000.0)
+            self._frame.set_pixel(i, color)
+            self._show(wait_ms / 1000.0)
         return self._stmt_index + 1
 
     def theaterChase(self, stmt):
@@ -128,7 +260,7 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         Movie theater light style chaser animation.
         theaterchase r g b [wait iterations]
         """
-        color = self._leddev.color(stmt[1], stmt[2], stmt[3])
+        color = stmt[1:4]
         wait_ms = 50.0
         iterations = 10
         span = 6
@@ -139,21 +271,12 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
             if self._terminate_event.isSet():
                 break
             for q in range(span):
-                i = q
-                while i < self._leddev.numPixels():
-                    self._leddev.setPixelColor(i, color)
-                    i += span
-
-                self._leddev.show()
-                time.sleep(wait_ms/1000.0)
-
-                i = q
-                while i < self._leddev.numPixels():
-                    self._leddev.setPixelColor(i, 0)
-                    i += span
+                self._frame.fill_range(color, start=q, step=span)
+                self._show(wait_ms / 1000.0)
+                self._frame.fill_range(BLACK, start=q, step=span)
 
         # Clear the last set of pixels
-        self._leddev.show()
+        self._show(0)
 
         return self._stmt_index + 1
 
@@ -162,14 +285,14 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         Airport runway style chaser animation.
         runwaychase r g b [transit-time iterations]
         """
-        color = self._leddev.color(stmt[1], stmt[2], stmt[3])
+        color = stmt[1:4]
         # This is the runway length in "time"
         transit_time = 1000.0
         iterations = 10
         if len(stmt) > 4:
             transit_time = stmt[4]
             iterations = int(stmt[5])
-        background_color = self._leddev.color(0, 0, 0)
+        num_pixels = self._frame.num_pixels
 
         # This is the per pass step time
         wait_ms = transit_time / 1000.0
@@ -177,24 +300,20 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         for j in range(iterations):
             if self._terminate_event.is_set():
                 break
-            for px in range(self._leddev.numPixels()):
+            for px in range(num_pixels):
                 if self._terminate_event.is_set():
                     break
                 # Clear previous pixel
-                if px == 0:
-                    self._leddev.setPixelColor(self._leddev.numPixels() - 1, background_color)
-                if px > 0:
-                    self._leddev.setPixelColor(px - 1, background_color)
+                self._frame.set_pixel(px - 1 if px > 0 else num_pixels - 1, BLACK)
                 # Set the next pixel
-                self._leddev.setPixelColor(px, color)
-                self._leddev.show()
-                time.sleep(wait_ms)
+                self._frame.set_pixel(px, color)
+                self._show(wait_ms)
 
             # TODO This needs to be a fixed time
             time.sleep(0.25)
 
         # Clear the last set of pixels
-        self._leddev.clear()
+        self._clear()
 
         return self._stmt_index + 1
 
@@ -203,10 +322,7 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         Movie theater light style chaser animation using 2 colors.
         theaterchase r g b [wait iterations]
         """
-        colors = [
-            self._leddev.color(stmt[1], stmt[2], stmt[3]),
-            self._leddev.color(stmt[4], stmt[5], stmt[6])
-        ]
+        colors = [stmt[1:4], stmt[4:7]]
         wait_ms = 50.0
         iterations = 10
         span = 6
@@ -221,23 +337,16 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
             if self._terminate_event.isSet():
                 break
             for q in range(span):
-                i = q
-                while i < self._leddev.numPixels():
-                    self._leddev.setPixelColor(i, colors[c])
-                    i += span
+                self._frame.fill_range(colors[c], start=q, step=span)
                 # Cycle the color
                 c = (c + 1) % 2
 
-                self._leddev.show()
-                time.sleep(wait_ms/1000.0)
+                self._show(wait_ms / 1000.0)
 
-                i = q
-                while i < self._leddev.numPixels():
-                    self._leddev.setPixelColor(i, 0)
-                    i += span
+                self._frame.fill_range(BLACK, start=q, step=span)
 
         # Clear the last set of pixels
-        self._leddev.show()
+        self._show(0)
 
         return self._stmt_index + 1
 
@@ -249,25 +358,24 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         """
         wait_ms = float(stmt[1])
         span = 3
+        # The rainbow cycles through 255 of the 256 wheel positions
+        wheel_table = self._wheel_table[:255]
+        positions = self._frame.indexes([i % 255 for i in range(self._frame.num_pixels)])
+
+        def draw():
+            self._frame.gather(wheel_table, positions, offset=j % 255)
+            self._frame.keep_every(q, span)
+
         for j in range(256):
             if self._terminate_event.isSet():
                 break
             for q in range(span):
-                i = q
-                while i < self._leddev.numPixels():
-                    self._leddev.setPixelColor(i, self.wheel((i + j) % 255))
-                    i += span
-
-                self._leddev.show()
-                time.sleep(wait_ms / 1000.0)
-
-                i = q
-                while i < self._leddev.numPixels():
-                    self._leddev.setPixelColor(i, 0)
-                    i += span
+                self._draw_cached("theaterchaserainbow", (j, q), draw)
+                self._show(wait_ms / 1000.0)
 
         # Clear the last set of pixels
-        self._leddev.show()
+        self._frame.clear()
+        self._show(0)
 
         return self._stmt_index + 1
 
@@ -282,10 +390,11 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         :param stmt:
         :return:
         """
-        color = self._leddev.color(stmt[1], stmt[2], stmt[3])
+        color = stmt[1:4]
         wait_ms = float(stmt[4]) / 1000.0
         iterations = int(float(stmt[5]))
         n = int(stmt[6])
+        num_pixels = self._frame.num_pixels
 
         head = 0    # Index of first 'on' pixel
         tail = -n   # Index of last 'off' pixel - sets the length of pixel string
@@ -294,23 +403,22 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
             if self._terminate_event.isSet():
                 break
 
-            self._leddev.setPixelColor(head, color)  # Turn on 'head' pixel
+            self._frame.set_pixel(head, color)  # Turn on 'head' pixel
             if tail >= 0:
-                self._leddev.setPixelColor(tail, 0)  # Turn off 'tail'
-            self._leddev.show()  # Refresh strip
-            time.sleep(wait_ms)  # Pause for delay time
+                self._frame.set_pixel(tail, BLACK)  # Turn off 'tail'
+            self._show(wait_ms)  # Refresh strip and pause for delay time
 
             head += 1  # Advance head position
-            if (head >= self._leddev.numPixels()):  # Off end of strip?
+            if (head >= num_pixels):  # Off end of strip?
                 head = 0  # Reset to start
 
             tail += 1  # Advance tail position
-            if tail >= self._leddev.numPixels():
+            if tail >= num_pixels:
                 tail = 0  # Off end? Reset
 
         # Not well documented, but this is how you turn
         # off everything
-        self._leddev.clear()
+        self._clear()
         self._leddev.show()
         return self._stmt_index + 1
 
@@ -322,7 +430,7 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         r = int(ScriptCPULED.get_random_int(max_value=255))
         g = int(ScriptCPULED.get_random_int(max_value=255))
         b = int(ScriptCPULED.get_random_int(max_value=255))
-        return self._leddev.color(r, g, b)
+        return r, g, b
 
     def random_pixels(self, stmt):
         """
@@ -332,8 +440,7 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         :return:
         """
         pixels = deque()
-        active_size = int(self._leddev.numPixels() / 2)
-        color = self._leddev.color(255, 0, 0)
+        active_size = int(self._frame.num_pixels / 2)
         wait = float(stmt[1]) / 1000.0
         iterations = int(stmt[2])
 
@@ -342,13 +449,12 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
                 break
             if len(pixels) >= active_size:
                 p = pixels.pop()
-                self._leddev.setPixelColor(p, 0)
-            p = ScriptCPULED.get_random_int(max_value=self._leddev.numPixels())
+                self._frame.set_pixel(p, BLACK)
+            p = ScriptCPULED.get_random_int(max_value=self._frame.num_pixels)
             pixels.appendleft(p)
-            self._leddev.setPixelColor(p, self.get_random_color())
-            self._leddev.show()
-            time.sleep(wait)
-        self._leddev.clear()
+            self._frame.set_pixel(p, self.get_random_color())
+            self._show(wait)
+        self._clear()
         return self._stmt_index + 1
 
     def brightness(self, stmt):
@@ -358,7 +464,9 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         :param stmt:
         :return:
         """
-        self._leddev.setBrightness(stmt[1])
+        # The output pipeline (if any) applies brightness with 16 bit precision
+        if not self._frame.set_brightness(stmt[1]):
+            self._leddev.setBrightness(stmt[1])
         return self._stmt_index + 1
 
     def sinewave(self, stmt):
@@ -371,23 +479,18 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         iterations = int(float(stmt[2]))
         width = float(stmt[3])
         center = float(stmt[4])
-        pixels = self._leddev.numPixels()
+        pixels = self._frame.num_pixels
 
-        color_gen = SineColorCycler()
-        # In binary RGB format. May require reordering.
-        color_list = color_gen.create_color_list(center=center, width=width, colors=pixels)
+        # One color per pixel (memoized, a do-forever loop reuses the list)
+        self._frame.set_pixels(sine_color_list(center=center, width=width, colors=pixels))
 
-        colorx = 0
         for i in range(iterations):
             if self._terminate_event.isSet():
                 break
-            for cx in range(pixels):
-                modx = (colorx + cx) % len(color_list)
-                self._leddev.setPixelColor(cx, color_list[modx])
-            self._leddev.show()
-            colorx = (colorx + 1) % len(color_list)
-            time.sleep(wait_ms)
-        self._leddev.clear()
+            self._show(wait_ms)
+            # The wave moves one pixel toward pixel 0 every iteration
+            self._frame.rotate(-1)
+        self._clear()
 
         return self._stmt_index + 1
 
@@ -401,11 +504,9 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         if len(stmt) >= 5:
             wait_ms = stmt[4]
 
-        color = self._leddev.color(stmt[1], stmt[2], stmt[3])
-        for i in range(self._leddev.numPixels()):
-            self._leddev.setPixelColor(i, color)
-
-        self._leddev.show()
+        self._frame.fill(stmt[1:4])
+        # A solid color is shown at once, it is not a keyframe
+        self._show(0)
         if not self._terminate_event.isSet():
             # Sleep time is in seconds (can be a float)
             # Wait time is in milliseconds.
@@ -415,39 +516,26 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
     def colorfade_stmt(self, stmt):
         """
         Run the color fade algorithm.
-        colorfade r g b r g b wait iterations
+        colorfade r g b r g b wait iterations easing gamma
         """
         # Arguments
-        from_color = [stmt[1], stmt[2], stmt[3]]
-        to_color = [stmt[4], stmt[5], stmt[6]]
+        from_color = tuple(int(v) for v in stmt[1:4])
+        to_color = tuple(int(v) for v in stmt[4:7])
         wait_ms = stmt[7]
-        iterations = stmt[8]
-
-        # Calc color delta for each iteration
-        delta_rgb = [0.0, 0.0, 0.0]
-        for i in range(3):
-            delta_rgb[i] = float(to_color[i] - from_color[i]) / float(iterations - 1.0)
+        iterations = int(stmt[8])
+        easing = stmt[9]
+        # Gamma correcting the ramp and the output would correct it twice
+        gamma = stmt[10] and not self._pipeline_gamma
 
-        current_color = from_color[:]
-        for it in range(int(iterations + 1.0)):
-            # logger.debug(current_color)
-            color = self._leddev.color(current_color[0], current_color[1], current_color[2])
-            for i in range(self._leddev.numPixels()):
-                self._leddev.setPixelColor(i, color)
+        # The whole fade is computed up front, one color per iteration
+        ramp = self._frame.table(build_fade(from_color, to_color, iterations, easing=easing, gamma=gamma))
 
-            self._leddev.show()
-
-            if not self._terminate_event.isSet():
-                # Sleep time is in seconds (can be a float)
-                # Wait time is in milliseconds.
-                time.sleep(wait_ms / 1000.0)
-            else:
+        for it in range(iterations):
+            self._frame.fill(ramp[it])
+            self._show(wait_ms / 1000.0)
+            if self._terminate_event.isSet():
                 break
 
-            # Generate next color
-            for i in range(3):
-                current_color[i] = round(float(from_color[i]) + (delta_rgb[i] * float(it)))
-
         return self._stmt_index + 1
 
     def twocolor_stmt(self, stmt):
@@ -456,38 +544,24 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         twocolor r g b r g b wait iterations
         """
         # Arguments
-        color1 = [stmt[1], stmt[2], stmt[3]]
-        color2 = [stmt[4], stmt[5], stmt[6]]
+        color1 = stmt[1:4]
+        color2 = stmt[4:7]
         wait_ms = stmt[7]
         iterations = stmt[8]
 
-        which_color = True
-        for it in range(int(iterations)):
-            for px in range(self._leddev.numPixels()):
-                if px % 2 == 0:
-                    if which_color:
-                        current_color = self._leddev.color(color1[0], color1[1], color1[2])
-                    else:
-                        current_color = self._leddev.color(color2[0], color2[1], color2[2])
-                else:
-                    if which_color:
-                        current_color = self._leddev.color(color2[0], color2[1], color2[2])
-                    else:
-                        current_color = self._leddev.color(color1[0], color1[1], color1[2])
+        # Even pixels get the first color, odd pixels get the second color
+        patterns = [self._frame.table([color1, color2]), self._frame.table([color2, color1])]
 
-                self._leddev.setPixelColor(px, current_color)
+        which_color = 0
+        for it in range(int(iterations)):
+            self._frame.fill_pattern(patterns[which_color])
 
             # Show all pixels
-            self._leddev.show()
-
-            if not self._terminate_event.isSet():
-                # Sleep time is in seconds (can be a float)
-                # Wait time is in milliseconds.
-                time.sleep(wait_ms / 1000.0)
-            else:
+            self._show(wait_ms / 1000.0)
+            if self._terminate_event.isSet():
                 break
 
-            which_color = not which_color
+            which_color = 1 - which_color
 
         return self._stmt_index + 1
 
@@ -497,28 +571,285 @@ class ScriptCPULED(script_cpu_base.ScriptCPUBase):
         :param stmt:
         :return:
         """
-        pixel_gen = Color77PixelGenerator(num_pixels=self._leddev.numPixels(), color_list=stmt[1])
-        wait_ms = stmt[2]
-        iterations = stmt[3]
+        pixel_gen = get_generator("color77")(num_pixels=self._frame.num_pixels, color_list=stmt[1])
+        self._run_generator(pixel_gen, stmt[2], stmt[3])
+        return self._stmt_index + 1
+
+    def generator_stmt(self, stmt):
+        """
+        Run a registered pixel generator (see generator_registry).
+        generator name options wait iterations
+        :param stmt: stmt[2] is a dict of keyword options for the generator
+        :return:
+        """
+        try:
+            generator_class = get_generator(stmt[1])
+            pixel_gen = generator_class(num_pixels=self._frame.num_pixels, **stmt[2])
+        except Exception as ex:
+            logger.error("Unable to create generator %s: %s", stmt[1], str(ex))
+            return self._stmt_index + 1
+        self._run_generator(pixel_gen, stmt[3], stmt[4])
+        return self._stmt_index + 1
 
+    def _run_generator(self, pixel_gen, wait_ms, iterations):
+        """
+        Show the frames of a pixel generator
+        :param pixel_gen: A PixelGenerator instance
+        :param wait_ms: Time between frames in milliseconds
+        :param iterations: Number of frames
+        :return: None
+        """
         pixel_gen.start()
 
         for it in range(int(iterations)):
-            for px in range(self._leddev.numPixels()):
-                # Change color format from (r,g,b) to 0xrrggbb
-                c = Color77PixelGenerator.color(pixel_gen.pixel(px))
-                self._leddev.setPixelColor(px, c)
-            self._leddev.show()
-
-            if not self._terminate_event.isSet():
-                # Sleep time is in seconds (can be a float)
-                # Wait time is in milliseconds.
-                time.sleep(wait_ms / 1000.0)
-            else:
+            # The generator draws the whole frame
+            pixel_gen.render(self._frame, it)
+            self._show(wait_ms / 1000.0)
+            if self._terminate_event.isSet():
                 break
 
-            pixel_gen.step()
-
         pixel_gen.stop()
 
+    def palette_cycle(self, stmt):
+        """
+        Cycle all pixels together through the colors of a palette.
+        palettecycle palette wait iterations
+        :param stmt: stmt[1] is the palette lookup table
+        :return:
+        """
+        palette = stmt[1]
+        wait_ms = float(stmt[2])
+        iterations = int(stmt[3])
+        for j in range(len(palette) * iterations):
+            if self._terminate_event.isSet():
+                break
+            self._frame.fill(palette[j % len(palette)])
+            self._show(wait_ms / 1000.0)
+        return self._stmt_index + 1
+
+    def palette_scroll(self, stmt):
+        """
+        Spread a palette across all pixels and scroll it along the strip.
+        palettescroll palette wait iterations
+        :param stmt: stmt[1] is the palette lookup table
+        :return:
+        """
+        palette = self._frame.table(stmt[1])
+        wait_ms = float(stmt[2])
+        iterations = int(stmt[3])
+        size = len(stmt[1])
+        num_pixels = self._frame.num_pixels
+        positions = self._frame.indexes([int(i * size / num_pixels) for i in range(num_pixels)])
+        for j in range(size * iterations):
+            if self._terminate_event.isSet():
+                break
+            self._frame.gather(palette, positions, offset=j % size)
+            self._show(wait_ms / 1000.0)
+        return self._stmt_index + 1
+
+    #
+    # 2D algorithms. The frame is a grid of width x height pixels in row
+    # order (see engine/layout.py). A strip is a grid with one row.
+    #
+
+    def row_sweep(self, stmt):
+        """
+        Sweep a lit row from the top to the bottom of the grid.
+        rowsweep r g b wait iterations
+        :param stmt:
+        :return:
+        """
+        color = stmt[1:4]
+        wait_ms = float(stmt[4])
+        iterations = int(stmt[5])
+        width = self._frame.width
+        for j in range(self._frame.height * iterations):
+            if self._terminate_event.isSet():
+                break
+            y = j % self._frame.height
+            self._frame.clear()
+            self._frame.fill_range(color, start=y * width, stop=(y + 1) * width)
+            self._show(wait_ms / 1000.0)
+        self._clear()
+        return self._stmt_index + 1
+
+    def column_sweep(self, stmt):
+        """
+        Sweep a lit column from the left to the right of the grid.
+        columnsweep r g b wait iterations
+        :param stmt:
+        :return:
+        """
+        color = stmt[1:4]
+        wait_ms = float(stmt[4])
+        iterations = int(stmt[5])
+        width = self._frame.width
+        for j in range(width * iterations):
+            if self._terminate_event.isSet():
+                break
+            self._frame.clear()
+            self._frame.fill_range(color, start=j % width, step=width)
+            self._show(wait_ms / 1000.0)
+        self._clear()
+        return self._stmt_index + 1
+
+    def radial_rainbow(self, stmt):
+        """
+        Draw rainbow rings that move out from the center of the grid.
+        radialrainbow wait iterations
+        :param stmt:
+        :return:
+        """
+        wait_ms = float(stmt[1])
+        iterations = int(stmt[2])
+        width = self._frame.width
+        height = self._frame.height
+
+        # Wheel position of each pixel is its distance from the center
+        cx = (width - 1) / 2.0
+        cy = (height - 1) / 2.0
+        radius = math.hypot(cx, cy) or 1.0
+        positions = self._frame.indexes([int(math.hypot(i % width - cx, i // width - cy) * 255 / radius)
+                                         for i in range(self._frame.num_pixels)])
+
+        def draw():
+            self._frame.gather(self._wheel_table, positions, offset=-j & 255)
+
+        for j in range(256 * iterations):
+            if self._terminate_event.isSet():
+                break
+            self._draw_cached(("radialrainbow", width), j & 255, draw)
+            self._show(wait_ms / 1000.0)
+        return self._stmt_index + 1
+
+    #
+    # Image algorithms. The image file is memory mapped (see engine/image_file.py)
+    # and each frame is copied from slices of the mapped pixels.
+    #
+
+    def _open_image(self, path, **kwargs):
+        """
+        Open an image file
+        :return: An ImageFile or None if the file cannot be used
+        """
+        try:
+            return ImageFile(path, **kwargs)
+        except Exception as ex:
+            logger.error("Unable to open image %s: %s", path, str(ex))
+            return None
+
+    def scroll_image(self, stmt):
+        """
+        Scroll an image across the grid from right to left, one column per frame.
+        scrollimage path wait iterations
+        :param stmt:
+        :return:
+        """
+        # A raw RGB image is as high as the grid
+        image = self._open_image(stmt[1], height=self._frame.height)
+        if image is None:
+            return self._stmt_index + 1
+        wait_ms = float(stmt[2])
+        iterations = int(stmt[3])
+        width = self._frame.width
+        rows = min(self._frame.height, image.height)
+        # Parts of the grid are black if the image is smaller than the grid
+        partial = rows < self._frame.height or image.width < width
+
+        try:
+            for k in range(image.width * iterations):
+                if self._terminate_event.isSet():
+                    break
+                x = k % image.width
+                # Columns x to the end of the image, then wrap around to column 0
+                count = min(width, image.width - x)
+                wrap = min(width, image.width) - count
+                if partial:
+                    self._frame.clear()
+                for y in range(rows):
+                    self._frame.write(image.row(y, x, count), start=y * width)
+                    if wrap:
+                        self._frame.write(image.row(y, 0, wrap), start=y * width + count)
+                self._show(wait_ms / 1000.0)
+        finally:
+            image.close()
+        return self._stmt_index + 1
+
+    def step_image(self, stmt):
+        """
+        Step through an image. Each frame is the next grid height rows of the image
+        (on a strip, each frame is the next row of the image).
+        stepimage path wait iterations
+        :param stmt:
+        :return:
+        """
+        # A raw RGB image is as wide as the grid
+        image = self._open_image(stmt[1], width=self._frame.width)
+        if image is None:
+            return self._stmt_index + 1
+        wait_ms = float(stmt[2])
+        iterations = int(stmt[3])
+        width = self._frame.width
+        height = self._frame.height
+        frames = max(image.height // height, 1)
+        rows = min(height, image.height)
+
+        try:
+            for k in range(frames * iterations):
+                if self._terminate_event.isSet():
+                    break
+                first = (k % frames) * height
+                if image.width == width and rows == height:
+                    # The frame is one contiguous slice of the image
+                    self._frame.write(image.rows(first, rows))
+                else:
+                    self._frame.clear()
+                    for y in range(rows):
+                        self._frame.write(image.row(first + y, 0, min(width, image.width)), start=y * width)
+                self._show(wait_ms / 1000.0)
+        finally:
+            image.close()
+        return self._stmt_index + 1
+
+    def audio(self, stmt):
+        """
+        Audio reactive algorithm. The pixels are split into one range per
+        frequency band. The brightness of a range follows the level of its band.
+        audio source bands wait
+        :param stmt:
+        :return:
+        """
+        source = stmt[1]
+        bands = max(int(stmt[2]), 1)
+        wait_ms = float(stmt[3])
+
+        # The analyzer needs NumPy, so it is imported on first use
+        try:
+            from .audio_analyzer import AudioAnalyzer
+            analyzer = AudioAnalyzer(source, bands, wait_ms / 1000.0)
+        except ImportError:
+            logger.error("The audio algorithm requires NumPy")
+            return self._stmt_index + 1
+        except Exception as ex:
+            logger.error("Unable to open audio source %s: %s", source, str(ex))
+            return self._stmt_index + 1
+
+        num_pixels = self._frame.num_pixels
+        bounds = [int(b * num_pixels / bands) for b in range(bands + 1)]
+        band_colors = [ScriptCPULED.wheel_rgb(int(b * 256 / bands)) for b in range(bands)]
+
+        analyzer.start()
+        try:
+            while not self._terminate_event.isSet() and not analyzer.ended:
+                # The latest levels (the analyzer never blocks the frame)
+                levels = analyzer.levels
+                for b in range(bands):
+                    color = [int(c * levels[b]) for c in band_colors[b]]
+                    self._frame.fill_range(color, start=bounds[b], stop=bounds[b + 1])
+                self._show(wait_ms / 1000.0)
+        finally:
+            analyzer.stop()
+            # A pipe read can block until the writer sends more audio
+            analyzer.join(timeout=1.0)
+        self._clear()
         return self._stmt_index + 1
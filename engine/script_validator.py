@@ -0,0 +1,185 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Script directory validator
+#
+# Every script file in the script file directory is compiled in a pool
+# of worker processes. The compiles run on other cores (and outside of
+# the server's GIL), so validation does not slow down the server or a
+# running script. The workers are spawned, not forked, because the server
+# is multithreaded. On a single core system, there is no other core to
+# run on and the files are compiled on the validation thread. Each
+# successful compile is saved as a compiled script
+# file and added to the engine's compiled script cache, so a later start
+# of the script does not need to compile it.
+#
+
+import os
+import glob
+import pickle
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import script_vm
+from . import compiled_script
+from .script_cache import ScriptCache
+
+logger = logging.getLogger("led")
+
+
+def compile_script_file(script_file, search_path):
+    """
+    Compile a script file. This function runs in a worker process.
+    :param script_file: Full path to the script file
+    :param search_path: Directory searched for imported files
+    :return: A tuple (script_file, error, vm, fingerprints). error is None
+    if the script compiled. Otherwise, it is the first compile error message.
+    vm and fingerprints are None if the script did not compile (or the VM
+    cannot be returned to the server).
+    """
+    from . import script_compiler
+
+    try:
+        vm = script_vm.ScriptVM(script_file)
+        compiler = script_compiler.ScriptCompiler(vm, search_path=search_path)
+        if not compiler.compile(script_file):
+            # The compiler stops at the first error (location, message)
+            errors = compiler.last_error
+            return script_file, ": ".join(errors) if errors else "Compile failed", None, None
+    except Exception as ex:
+        return script_file, str(ex), None, None
+
+    fingerprints = ScriptCache.source_fingerprints(vm)
+    if fingerprints is None:
+        return script_file, None, None, None
+    compiled_script.save(vm, fingerprints)
+
+    # The VM goes back to the server only if it survives the trip
+    try:
+        pickle.dumps(vm)
+    except Exception as ex:
+        logger.debug("Compiled script %s cannot be returned to the server: %s", script_file, str(ex))
+        return script_file, None, None, None
+    return script_file, None, vm, fingerprints
+
+
+class ScriptValidator:
+    """
+    Validates (compiles) all of the script files in a directory.
+    Validation runs on a background thread which hands the compiles to
+    a process pool. The results (valid or first error) are kept by
+    script file name.
+    """
+    def __init__(self, cache=None):
+        """
+        Constructor
+        :param cache: A ScriptCache to be filled with the compiled VMs
+        """
+        self._cache = cache
+        self._results = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def validating(self):
+        """
+        Returns True while a validation pass is running
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def results(self):
+        """
+        Returns the validation results of the last pass.
+        :return: Dict of script file name (no path): {"valid": True/False, "error": message}
+        """
+        with self._lock:
+            return {name: dict(result) for name, result in self._results.items()}
+
+    def start(self, script_directory, max_workers=None):
+        """
+        Start validating all of the *.led files in a directory.
+        The call returns immediately.
+        :param script_directory: The script file directory
+        :param max_workers: Number of worker processes. The default is one less
+        than the number of CPUs. With one CPU, the files are compiled in process.
+        :return: True if validation started. False if a pass is already running.
+        """
+        if self.validating:
+            return False
+        self._thread = threading.Thread(target=self._validate, name="ScriptValidator",
+                                        args=(script_directory, max_workers), daemon=True)
+        self._thread.start()
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Wait for a validation pass to end
+        :param timeout: Maximum wait in seconds
+        :return: True if validation is not running
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.validating
+
+    def _validate(self, script_directory, max_workers):
+        """
+        Validation thread
+        """
+        files = sorted(glob.glob(os.path.join(script_directory, "*.led")))
+        if not files:
+            return
+        logger.info("Validating %d script files in %s", len(files), script_directory)
+
+        if max_workers is None:
+            # Leave a core for the server and the running script
+            max_workers = (os.cpu_count() or 1) - 1
+
+        results = {}
+        try:
+            if max_workers < 1:
+                for f in files:
+                    self._add_result(results, *compile_script_file(f, script_directory))
+            else:
+                # Forking a multithreaded process can deadlock the child
+                with ProcessPoolExecutor(max_workers=max_workers,
+                                         mp_context=multiprocessing.get_context("spawn")) as executor:
+                    futures = [executor.submit(compile_script_file, f, script_directory) for f in files]
+                    for future in as_completed(futures):
+                        self._add_result(results, *future.result())
+        except Exception as ex:
+            logger.error("Script validation failed: %s", str(ex))
+            return
+
+        with self._lock:
+            self._results = results
+        invalid = len([r for r in results.values() if not r["valid"]])
+        logger.info("Validated %d script files, %d not valid", len(results), invalid)
+
+    def _add_result(self, results, script_file, error, vm, fingerprints):
+        """
+        Record the result of one compile
+        :param results: Dict of results by script file name
+        :param script_file: Full path to the script file
+        :param error: None or the first compile error message
+        :param vm: The compiled VM or None
+        :param fingerprints: Source fingerprints of the VM or None
+        """
+        name = os.path.split(script_file)[1]
+        if error is None:
+            results[name] = {"valid": True}
+            if self._cache is not None and vm is not None:
+                self._cache.put(ScriptCache.key(script_file), vm, fingerprints=fingerprints)
+        else:
+            results[name] = {"valid": False, "error": error}
+            logger.error("Script %s is not valid: %s", name, error)
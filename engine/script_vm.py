@@ -13,18 +13,30 @@
 # Script virtual machine
 #
 
+from collections import ChainMap
+from . import webcolor_definitions
+
+
 class ScriptVM():
-    def __init__(self, script_file):
+    def __init__(self, script_file, parameters=None):
         # TODO Some/most/all of these should be made properties
 
         # Underlying script file
         self.script_file = script_file
 
+        # Script parameters (name: value) that override define/color statements
+        self.parameters = parameters if parameters else {}
+
+        # The main script file and all imported files (full paths)
+        self.source_files = []
+
         # Script statements are a list of token lists
         self.stmts = []
 
-        # Color definitions
-        self.colors = {}
+        # Color definitions. Colors defined by the script are layered
+        # over the shared, read-only web color table. A script color
+        # overrides a web color of the same name.
+        self.colors = ChainMap({}, webcolor_definitions.CSS3_NAMES_TO_RGB)
 
         # Defines
         self.defines = {}
@@ -42,5 +54,24 @@ class ScriptVM():
             (255,0,255)
         ]
 
+        # Gradient palettes (name: 256 entry color table)
+        self.palettes = {}
+
         # Main statement index
         self.main_index = -1
+
+    def __getstate__(self):
+        """
+        Pickle support. Compiled VMs are passed between processes.
+        """
+        state = self.__dict__.copy()
+        # The web color table is shared. Only script defined colors are pickled.
+        state["colors"] = dict(self.colors.maps[0])
+        # eval() adds the builtins module to the globals dict
+        state["evals"] = {k: v for k, v in self.evals.items() if k != "__builtins__"}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.colors = ChainMap(state["colors"], webcolor_definitions.CSS3_NAMES_TO_RGB)
+        self.palettes = state.get("palettes", {})
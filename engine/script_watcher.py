@@ -0,0 +1,99 @@
+#
+# AtHomeLED - LED script engine
+# Copyright © 2016, 2020  Dave Hocker
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# See the LICENSE file for more details.
+#
+
+#
+# Script source file watcher (hot reload)
+#
+
+import os
+import threading
+import logging
+
+logger = logging.getLogger("led")
+
+
+class ScriptWatcher(threading.Thread):
+    """
+    Watches the source files (main script file and all imported files)
+    of the running script. When a file changes, the reload callback is
+    called to recompile the script and swap it into the engine.
+
+    The files are polled using os.stat(). Each poll is one stat call per
+    source file, so the cost is negligible while nothing changes.
+    A change must be seen on two consecutive polls before a reload is
+    done. This lets an editor finish saving a file.
+    """
+    DEFAULT_INTERVAL = 1.0
+
+    def __init__(self, vm, reload, interval=DEFAULT_INTERVAL):
+        """
+        Constructor
+        :param vm: The running VM. Its source_files are watched.
+        :param reload: Called on the watcher thread when a source file changes.
+        Returns the new VM or None if the script did not compile.
+        :param interval: Poll interval in seconds
+        """
+        threading.Thread.__init__(self, name="ScriptWatcher", daemon=True)
+        self._files = list(vm.source_files)
+        self._snapshot = ScriptWatcher.snapshot(self._files)
+        self._changed = None
+        self._reload = reload
+        self._interval = interval
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def snapshot(files):
+        """
+        Take a snapshot of the state of a list of files
+        :param files: List of file paths
+        :return: List of (mtime_ns, size) tuples. A file that cannot be read is None.
+        """
+        snapshot = []
+        for f in files:
+            try:
+                st = os.stat(f)
+                snapshot.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                snapshot.append(None)
+        return snapshot
+
+    def run(self):
+        logger.info("Watching %d script source files", len(self._files))
+        while not self._stop_event.wait(self._interval):
+            snapshot = ScriptWatcher.snapshot(self._files)
+            if snapshot == self._snapshot:
+                self._changed = None
+                continue
+            # Wait until the files have stopped changing
+            if snapshot != self._changed:
+                self._changed = snapshot
+                continue
+
+            logger.info("Script source files changed, reloading %s", self._files[0])
+            vm = self._reload()
+            if vm is not None:
+                # The new script may import different files
+                self._files = list(vm.source_files)
+                snapshot = ScriptWatcher.snapshot(self._files)
+            else:
+                # Keep running the old script until the next change
+                logger.error("Reload failed, the running script is unchanged")
+            self._snapshot = snapshot
+            self._changed = None
+        logger.info("Stopped watching script source files")
+
+    def stop(self):
+        """
+        Stop watching. Called on any thread other than the watcher thread.
+        :return: None
+        """
+        self._stop_event.set()
+        self.join()
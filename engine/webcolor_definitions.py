@@ -12,6 +12,8 @@
 # http://www.w3.org/TR/css3-color/#svg-color
 #
 
+from types import MappingProxyType
+
 
 CSS3_NAMES_TO_HEX = {
     "aliceblue": "#f0f8ff",
@@ -162,3 +164,18 @@ CSS3_NAMES_TO_HEX = {
     "yellow": "#ffff00",
     "yellowgreen": "#9acd32",
 }
+
+
+def _hex_to_rgb(hex_value):
+    """
+    Convert a #rrggbb hex color to an (r, g, b) tuple
+    :param hex_value: Color in the form #rrggbb
+    :return: 3-tuple (r, g, b)
+    """
+    return int(hex_value[1:3], 16), int(hex_value[3:5], 16), int(hex_value[5:7], 16)
+
+
+# The CSS3/SVG named colors as (r, g, b) tuples. The table is built once at
+# import time and is read-only. It is shared by all compiled scripts.
+CSS3_NAMES_TO_RGB = MappingProxyType(
+    {name: _hex_to_rgb(hex_value) for name, hex_value in CSS3_NAMES_TO_HEX.items()})